@@ -12,12 +12,16 @@ from flask_praetorian import Praetorian
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from .cache import PageCache
+from .shared_cache import SharedCache
 
 mail = Mail()
 migrate = Migrate()
 guard = Praetorian()
 cors = CORS()
 limiter = Limiter(key_func=get_remote_address)
+page_cache = PageCache()
+shared_cache = SharedCache()
 
 # create naming convention for Alembic migrations
 # as per Flask docs: https://flask-sqlalchemy.palletsprojects.com/en/2.x/config/#using-custom-metadata-and-naming-conventions
@@ -47,6 +51,8 @@ def create_app(config_name):
     cors.init_app(app)
 
     limiter.init_app(app)
+    page_cache.init_app(app)
+    shared_cache.init_app(app)
 
     # set render_as_batch=True to fix sqlite migration issues
     # as per Miguel: https://youtu.be/wpRVZFwsD70
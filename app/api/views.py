@@ -4,25 +4,92 @@ import flask_praetorian
 from time import sleep
 from . import api
 # from .utils.to_json import node_to_json
-from .. import db, guard, limiter
+from .. import db, guard, limiter, page_cache
 from ..models import User, Quote, Post, Node, Resource, Video
 from ..app_mail import send_email
+from ..cache import response_body
+
+
+def paginated(get_page):
+    """
+    lists are sent whole by default, or a page at a time as
+    {'items': [...], 'next': cursor} when ?limit= is given. The next page
+    is fetched with ?limit=&cursor=<next>, next is null on the last page
+    """
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return jsonify(get_page().items)
+    if limit < 1:
+        abort(400)
+    try:
+        page = get_page(
+            min(limit, current_app.config['MAX_PAGE_SIZE']),
+            request.args.get('cursor')
+        )
+    except ValueError:
+        abort(400)
+    return jsonify(items=page.items, next=page.next)
 
 
 @api.route('/qt-data')
+@page_cache.cached(Quote)
 def qt_data():
-    return jsonify(Quote.to_dict_list())
+    return paginated(Quote.public_page)
+
+
+# the formats /vt-data can send, the first being the default
+GRAPH_MIMETYPES = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.thesaurus.columnar+json',
+    'binary': 'application/vnd.thesaurus.columnar',
+}
 
 
 @api.route('/vt-data')
 def vt_data():
-    nodes = Node.to_dict()
+    # ?format= wins over the Accept header, which defaults to the plain json
+    format = request.args.get('format')
+    if format is None:
+        mimetype = request.accept_mimetypes.best_match(GRAPH_MIMETYPES.values())
+        format = next(f for f, m in GRAPH_MIMETYPES.items() if m == mimetype) \
+            if mimetype else 'json'
+    if format not in GRAPH_MIMETYPES:
+        abort(400)
+
+    # the graph only changes when an editor saves, so send the cached bytes
+    etag, body = Node.get_graph_snapshot(format)
+    response = current_app.response_class(
+        response_body(body), mimetype=GRAPH_MIMETYPES[format]
+    )
+    response.content_length = len(body)
+    response.set_etag(etag)
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+
+@api.route('/vt-data/<title>')
+def vt_data_neighbourhood(title):
+    depth = request.args.get('depth', 1, type=int)
+    if not 0 <= depth <= current_app.config['VT_MAX_DEPTH']:
+        abort(400)
+    nodes = Node.get_neighbourhood(title, depth)
+    if nodes is None:
+        abort(404)
     return nodes
 
+
+@api.route('/vt-path/<start>/<end>')
+def vt_path(start, end):
+    path = Node.get_path(start, end)
+    if path is None:
+        abort(404)
+    return jsonify(path)
+
 @api.route('/get-node', methods=['GET'])
 def get_node():
     return Node.get_alt_term(None)
 
+
 @api.route('/get-node-<id>', methods=['GET'])
 def get_node_by_id(id):
     return Node.get_alt_term(id)
@@ -59,7 +126,7 @@ def gen_quotes():
     elif request.method == 'POST':
         Quote.new()
     
-    return jsonify(Quote.get_all_private())
+    return paginated(Quote.private_page)
 
 
 @api.route('/quotes-<id>', methods=['GET', 'POST', 'PUT', 'DELETE'])
@@ -87,6 +154,17 @@ def sp_quotes(id):
     return jsonify(Quote.get_all_private())
 
 
+@api.route('/quotes-<id>/move', methods=['PATCH'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def move_quotes(id):
+    # only returns the entries whose position changed
+    to = request.args.get('to', type=int)
+    if to is None:
+        abort(400)
+    return jsonify(Quote.move(id, to))
+
+
 @api.route('/resources', methods=['GET', 'PATCH', 'POST'])
 @flask_praetorian.auth_required
 @limiter.limit("1/second")
@@ -102,7 +180,7 @@ def gen_resources():
     elif request.method == 'POST':
         Resource.new()
     
-    return jsonify(Resource.get_all_private())
+    return paginated(Resource.private_page)
 
 
 @api.route('/resources-<id>', methods=['GET', 'POST', 'PUT', 'DELETE'])
@@ -129,6 +207,17 @@ def sp_resources(id):
     return jsonify(Resource.get_all_private())
 
 
+@api.route('/resources-<id>/move', methods=['PATCH'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def move_resources(id):
+    # only returns the entries whose position changed
+    to = request.args.get('to', type=int)
+    if to is None:
+        abort(400)
+    return jsonify(Resource.move(id, to))
+
+
 @api.route('/videos', methods=['GET', 'PATCH', 'POST'])
 @flask_praetorian.auth_required
 @limiter.limit("1/second")
@@ -144,7 +233,7 @@ def gen_videos():
     elif request.method == 'POST':
         Video.new()
     
-    return jsonify(Video.get_all_private())
+    return paginated(Video.private_page)
 
 
 @api.route('/videos-<id>', methods=['GET', 'POST', 'PUT', 'DELETE'])
@@ -170,6 +259,17 @@ def sp_videos(id):
     return jsonify(Video.get_all_private())
 
 
+@api.route('/videos-<id>/move', methods=['PATCH'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def move_videos(id):
+    # only returns the entries whose position changed
+    to = request.args.get('to', type=int)
+    if to is None:
+        abort(400)
+    return jsonify(Video.move(id, to))
+
+
 @api.route('/blog', methods=['GET', 'PATCH', 'POST'])
 @flask_praetorian.auth_required
 @limiter.limit("1/second")
@@ -186,7 +286,7 @@ def gen_blog():
     elif request.method == 'POST':
         Post.new(user_id)
     
-    return jsonify(Post.get_all_private())
+    return paginated(Post.private_page)
 
 
 @api.route('/blog-<id>', methods=['GET', 'POST', 'PUT', 'DELETE'])
@@ -213,6 +313,17 @@ def sp_blog(id):
     return jsonify(Post.get_all_private())
 
 
+@api.route('/blog-<id>/move', methods=['PATCH'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def move_blog(id):
+    # only returns the entries whose position changed
+    to = request.args.get('to', type=int)
+    if to is None:
+        abort(400)
+    return jsonify(Post.move(id, to))
+
+
 @api.route('/thesaurus', methods=['GET', 'PATCH', 'POST'])
 @flask_praetorian.auth_required
 @limiter.limit("1/second")
@@ -230,7 +341,46 @@ def gen_thesaurus():
     elif request.method == 'POST':
         Node.new()
     
-    return jsonify(Node.get_all_private())
+    return paginated(Node.private_page)
+
+
+@api.route('/thesaurus/words', methods=['GET'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def thesaurus_words():
+    # the editor can hold on to this and revalidate with If-None-Match
+    etag, words = Node.get_word_list()
+    response = jsonify(words)
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@api.route('/thesaurus/search', methods=['GET'])
+@flask_praetorian.auth_accepted
+def thesaurus_search():
+    # anyone can search published terms, signed in editors can find them all
+    try:
+        flask_praetorian.current_user_id()
+        published_only = False
+    except flask_praetorian.PraetorianError:
+        published_only = True
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify(Node.search(request.args.get('q', ''), limit, published_only))
+
+
+@api.route('/thesaurus-<id>/suggestions', methods=['GET'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def thesaurus_suggestions(id):
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify(Node.get_suggestions(id, limit))
+
+
+@api.route('/thesaurus/stats', methods=['GET'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def thesaurus_stats():
+    return jsonify(Node.get_graph_stats())
 
 
 @api.route('/thesaurus-<id>', methods=['GET', 'PUT', 'POST', 'DELETE'])
@@ -238,13 +388,16 @@ def gen_thesaurus():
 @limiter.limit("1/second")
 def sp_thesaurus(id):
 
+    # ?words=0 skips the word list, see /thesaurus/words
+    include_words = request.args.get('words') != '0'
+
     if request.method == 'GET':
-        return Node.get_by_id(id)
+        return Node.get_by_id(id, include_words)
     
     elif request.method == 'PUT':
         # remember that this needs to return a single object!
         data = request.get_json()
-        new_node = Node.update_by_id(id, data)
+        new_node = Node.update_by_id(id, data, include_words)
         return new_node
 
     elif request.method == 'POST':
@@ -255,3 +408,14 @@ def sp_thesaurus(id):
         Node.delete(id)
         
     return jsonify(Node.get_all_private())
+
+
+@api.route('/thesaurus-<id>/move', methods=['PATCH'])
+@flask_praetorian.auth_required
+@limiter.limit("1/second")
+def move_thesaurus(id):
+    # only returns the entries whose position changed
+    to = request.args.get('to', type=int)
+    if to is None:
+        abort(400)
+    return jsonify(Node.move(id, to))
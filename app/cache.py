@@ -0,0 +1,502 @@
+"""
+Process-level caches for data that only changes when an editor saves.
+
+Every INSERT/UPDATE/DELETE is recorded against its table as it runs, and once
+the session commits, the version counter of each table it wrote is bumped.
+A ModelCache remembers the versions it was built at and rebuilds itself the
+next time it is read after any of them moved. PageCache does the same for
+whole responses of public views.
+"""
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from contextlib import contextmanager, nullcontext
+
+try:
+    import fcntl
+except ImportError:  # not on windows, where builds are only coalesced per process
+    fcntl = None
+
+from flask import current_app, make_response, request
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+_versions = defaultdict(int)
+# bumped by schema changes (e.g. drop_all/create_all), invalidates everything
+_schema_version = 0
+# tables written by the transaction this thread is committing
+_staged = threading.local()
+
+
+def _table_name(model):
+    return getattr(model, '__tablename__', model)
+
+
+def version(*models):
+    """
+    returns the current version of each model (class or table name) as a
+    tuple, suitable for comparing or as a cache key
+    """
+    return (_schema_version,) + tuple(_versions[_table_name(m)] for m in models)
+
+
+def bump(*models):
+    """marks models as changed, e.g. after writing outside of a session"""
+    for m in models:
+        _versions[_table_name(m)] += 1
+
+
+# the time this thread started building something for every worker, see fresh_reads
+_building = threading.local()
+
+
+@contextmanager
+def fresh_reads():
+    """
+    while it is open, every ModelCache read in this thread is built from the
+    database once, rather than served as this process last built it. Things
+    built for every worker (see SharedStore) are stamped with the database
+    generations, which other workers' commits move straight away, while the
+    caches here only see those commits after max_age
+    """
+    if getattr(_building, 'since', None) is not None:
+        yield
+        return
+    _building.since = time.monotonic()
+    try:
+        yield
+    finally:
+        _building.since = None
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_write(conn, cursor, statement, parameters, context, executemany):
+    global _schema_version
+    if context is None or context.compiled is None:
+        return
+    if context.isddl:
+        _schema_version += 1
+    elif context.isinsert or context.isupdate or context.isdelete:
+        table = context.compiled.statement.table
+        conn.info.setdefault('written_tables', set()).add(table.name)
+
+
+@event.listens_for(Engine, 'commit')
+def _stage_writes(conn):
+    # fires just before the DBAPI commit; the versions are only bumped once
+    # the session reports the commit done, so nobody rebuilds from old data
+    _staged.__dict__.setdefault('tables', set()).update(
+        conn.info.pop('written_tables', ())
+    )
+
+
+@event.listens_for(Engine, 'rollback')
+def _forget_writes(conn):
+    conn.info.pop('written_tables', None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_versions(session):
+    bump(*_staged.__dict__.pop('tables', ()))
+
+
+class SingleFlight:
+    """
+    Lets one caller at a time rebuild a stale value, so a burst of requests
+    after an edit runs the build once rather than once per request. Threads
+    queue on a lock per key, and if path is given, processes on a lock file
+    per key in path too.
+
+        with flight.claim(key, wait=stale is None) as leader:
+            if not leader:
+                return stale        # someone else is rebuilding it
+            # check again, the value may have been rebuilt while waiting
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        if path:
+            os.makedirs(path, exist_ok=True)
+        # key -> [lock, callers holding or waiting for it]
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def lock_file(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.path, f'{name}.lock')
+
+    @contextmanager
+    def claim(self, key, wait=True):
+        """
+        yields True once this caller holds key, or False straight away if it
+        is held elsewhere and wait is False
+        """
+        with self._guard:
+            held = self._locks.setdefault(key, [threading.Lock(), 0])
+            held[1] += 1
+        try:
+            if not held[0].acquire(blocking=wait):
+                yield False
+                return
+            try:
+                if self.path is None or fcntl is None:
+                    yield True
+                    return
+                with open(self.lock_file(key), 'a') as f:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+                    except BlockingIOError:
+                        yield False
+                        return
+                    try:
+                        yield True
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            finally:
+                held[0].release()
+        finally:
+            with self._guard:
+                held[1] -= 1
+                if not held[1]:
+                    del self._locks[key]
+
+
+class ModelCache:
+    """
+    A value built from the database, rebuilt after a commit touches any of
+    models. Commits made by other worker processes are only picked up once
+    max_age seconds have passed. Only one thread rebuilds at a time, and with
+    serve_stale the others get the previous value meanwhile instead of
+    waiting for it. That coalescing is per process: every worker holds its
+    own value, so each rebuilds it once after an edit. Values one build
+    should serve every worker with belong in a SharedStore instead.
+
+    check, if given, returns something every worker sees change with
+    models (e.g. their database generations), and the value is rebuilt
+    whenever it differs from the last build. It runs on every get, so is
+    kept for values that must never be behind other workers' commits, such
+    as those sent with an ETag a client revalidates.
+    """
+
+    def __init__(self, builder, *models, max_age=60, serve_stale=False, check=None):
+        self.builder = builder
+        self.models = models
+        self.max_age = max_age
+        self.serve_stale = serve_stale
+        self.check = check
+        self._key = None
+        self._checked = None
+        self._built_at = 0
+        self._value = None
+        self._flight = SingleFlight()
+
+    def _fresh(self, key, checked=None, since=None):
+        return key == self._key and checked == self._checked \
+            and time.monotonic() - self._built_at <= self.max_age \
+            and (since is None or self._built_at >= since)
+
+    def get(self):
+        # read the versions before building, so a commit landing mid-build
+        # leaves this entry stale rather than marked as fresh
+        key = version(*self.models)
+        checked = self.check() if self.check is not None else None
+        since = getattr(_building, 'since', None)
+        if self._fresh(key, checked, since):
+            return self._value
+        stale = self.serve_stale and self._key is not None and since is None
+        with self._flight.claim('value', wait=not stale) as leader:
+            if not leader:
+                return self._value
+            if not self._fresh(key, checked, since):
+                now = time.monotonic()
+                self._value = self.builder()
+                self._key = key
+                self._checked = checked
+                self._built_at = now
+        return self._value
+
+    def patch(self, since, func):
+        """
+        brings the cached value up to date, instead of rebuilding it. since
+        is the version of models read before this process committed a change
+        to every one of them, and func(value) returns value with that change
+        applied. Other threads may be reading value meanwhile, so func must
+        leave it alone and change a copy; the copy replaces it in one step.
+        If anything else committed in between, the next get rebuilds as usual.
+        """
+        expected = (since[0],) + tuple(v + 1 for v in since[1:])
+        # queued with rebuilds, so neither overwrites the other's value
+        with self._flight.claim('value'):
+            if self._key != since or version(*self.models) != expected:
+                return
+            self._value = func(self._value)
+            self._key = expected
+
+    def clear(self):
+        self._key = None
+
+
+PageEntry = namedtuple(
+    typename='PageEntry',
+    field_names=['versions', 'stored_at', 'status', 'headers', 'body']
+)
+CHUNK = 64 * 1024
+
+
+def response_body(body):
+    """
+    returns body as something a response can send: bytes as they are, and a
+    memoryview (such as a payload mapped by SharedStore) as CHUNK sized
+    bytes. WSGI servers only take bytes, so each chunk is copied out of the
+    view as it is sent; what that saves is holding a copy of the whole body
+    per request, not the copying itself
+    """
+    if isinstance(body, (bytes, str)):
+        return body
+    return (bytes(body[i:i + CHUNK]) for i in range(0, len(body), CHUNK))
+
+
+class LRUStore:
+    """keeps up to size responses in memory, dropping the least recently used"""
+
+    # pages are checked against this process's versions, which its
+    # ModelCaches follow too, so they are read as they are (see fresh_reads)
+    shared = False
+
+    def __init__(self, size=256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.flight = SingleFlight()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self, *models):
+        return version(*models)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteStore:
+    """
+    keeps up to size responses in a local SQLite file, dropping the oldest.
+    Entries outlive the process, so max_age bounds how long a restarted
+    worker can serve a page from before its restart. Every worker using the
+    file renders a page once between them, through lock files in path.locks
+    """
+
+    shared = False
+
+    def __init__(self, path, size=256):
+        self.path = path
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.flight = SingleFlight(f'{path}.locks')
+        # sqlite connections can't be shared between threads
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'key TEXT PRIMARY KEY, versions TEXT, stored_at REAL, '
+            'status INTEGER, headers TEXT, body BLOB)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def __len__(self):
+        return self._connect().execute('SELECT count(*) FROM pages').fetchone()[0]
+
+    def version(self, *models):
+        return version(*models)
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT versions, stored_at, status, headers, body FROM pages WHERE key = ?',
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        versions, stored_at, status, headers, body = row
+        return PageEntry(
+            tuple(json.loads(versions)), stored_at, status,
+            [tuple(h) for h in json.loads(headers)], bytes(body)
+        )
+
+    def set(self, key, entry):
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+            (key, json.dumps(entry.versions), entry.stored_at, entry.status,
+             json.dumps(entry.headers), entry.body)
+        )
+        conn.execute(
+            'DELETE FROM pages WHERE key NOT IN '
+            '(SELECT key FROM pages ORDER BY stored_at DESC LIMIT ?)',
+            (self.size,)
+        )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM pages')
+
+
+class PageCache:
+    """
+    Caches whole responses of public GET views, keyed by path and query
+    string. Each view names the models it reads, and an entry is only served
+    while their versions match the ones it was rendered at. As with
+    ModelCache, commits made by other worker processes are only picked up
+    once PAGE_CACHE_MAX_AGE seconds have passed.
+
+    The 'shared' store is checked against the generations in the database
+    instead, so every worker sees a commit within SHARED_CACHE_INTERVAL.
+
+    config
+        PAGE_CACHE_TYPE: 'lru', 'sqlite', 'shared', or None to turn caching off.
+            'shared' keeps its pages under SHARED_CACHE_PATH, which must be set
+        PAGE_CACHE_SIZE: int, most responses kept
+        PAGE_CACHE_PATH: string, the file the sqlite store writes to
+        PAGE_CACHE_MAX_AGE: seconds
+    """
+
+    STORES = {
+        'lru': lambda config: LRUStore(config['PAGE_CACHE_SIZE']),
+        'sqlite': lambda config: SQLiteStore(
+            config['PAGE_CACHE_PATH'], config['PAGE_CACHE_SIZE']
+        ),
+        'shared': lambda config: _shared_store(config),
+    }
+
+    def init_app(self, app):
+        kind = app.config.get('PAGE_CACHE_TYPE')
+        if kind and kind not in self.STORES:
+            raise ValueError(f'unknown PAGE_CACHE_TYPE: {kind!r}')
+        if kind == 'shared' and not app.config.get('SHARED_CACHE_PATH'):
+            raise ValueError("PAGE_CACHE_TYPE 'shared' needs SHARED_CACHE_PATH set")
+        app.extensions['page_cache'] = self.STORES[kind](app.config) if kind else None
+
+    @property
+    def store(self):
+        return current_app.extensions.get('page_cache')
+
+    def stats(self):
+        """
+        returns hits, misses, stale (previous pages sent while another
+        request rendered the new one) and the number of entries of this
+        app's store
+        """
+        store = self.store
+        if store is None:
+            return {'hits': 0, 'misses': 0, 'stale': 0, 'entries': 0}
+        return {
+            'hits': store.hits, 'misses': store.misses, 'stale': store.stale,
+            'entries': len(store)
+        }
+
+    def clear(self):
+        if self.store is not None:
+            self.store.clear()
+
+    def cached(self, *models):
+        """
+        decorates a view whose response only depends on the url and models.
+        Only 200 responses are stored, and X-Cache says whether it was a hit.
+        Requests for a page another request is already rendering wait for
+        it, or are sent the previous page if there is one (X-Cache: STALE)
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                store = self.store
+                if store is None or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                # read before rendering, so a commit landing mid-render
+                # leaves this entry stale rather than marked as fresh
+                versions = store.version(*models)
+                now = time.time()
+                max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+
+                def fresh(entry):
+                    return entry is not None and entry.versions == versions \
+                        and now - entry.stored_at <= max_age
+
+                entry = store.get(key)
+                if fresh(entry):
+                    store.hits += 1
+                    return self._send(entry, 'HIT')
+
+                with store.flight.claim(key, wait=entry is None) as leader:
+                    if not leader:
+                        store.stale += 1
+                        return self._send(entry, 'STALE')
+                    # the page may have been rendered while this one waited
+                    entry = store.get(key)
+                    if fresh(entry):
+                        store.hits += 1
+                        return self._send(entry, 'HIT')
+
+                    store.misses += 1
+                    with fresh_reads() if store.shared else nullcontext():
+                        response = make_response(view(*args, **kwargs))
+                    if response.status_code == 200 and not response.direct_passthrough:
+                        store.set(key, PageEntry(
+                            versions, now, response.status_code,
+                            list(response.headers.items()), response.get_data()
+                        ))
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _send(entry, status):
+        response = current_app.response_class(
+            response_body(entry.body), status=entry.status, headers=entry.headers
+        )
+        response.headers['X-Cache'] = status
+        return response
+
+
+def _shared_store(config):
+    from .shared_cache import SharedStore
+
+    return SharedStore(
+        os.path.join(config['SHARED_CACHE_PATH'], 'pages'),
+        config['SHARED_CACHE_INTERVAL'],
+        config['PAGE_CACHE_SIZE']
+    )
@@ -5,8 +5,8 @@ from flask import (
     Blueprint, flash, g, redirect, render_template, request, url_for, 
     current_app, send_from_directory, abort
 )
-from . import forms
-from .models import Video, Post, Resource, Node
+from . import forms, page_cache
+from .models import Video, Post, PostContents, Resource, Node, NodeLink, User
 from .app_mail import send_email
 from .utils.link_check import link_check
 
@@ -14,6 +14,7 @@ from .utils.link_check import link_check
 bp = Blueprint('main', __name__)
 
 @bp.route('/')
+@page_cache.cached()
 def index():
     page = 'home'
     return render_template('index.html', page=page)
@@ -25,6 +26,7 @@ def visual_thesaurus():
 
 
 @bp.route('/alt-thesaurus')
+@page_cache.cached(Node, NodeLink)
 def alt_thesaurus():
     term = Node.get_alt_term(None)
     page = 'thesaurus'
@@ -32,6 +34,7 @@ def alt_thesaurus():
 
 
 @bp.route('/alt-thesaurus-<id>')
+@page_cache.cached(Node, NodeLink)
 def alt_thesaurus_by_id(id):
     term = Node.get_alt_term(id)
     page = 'thesaurus'
@@ -39,6 +42,7 @@ def alt_thesaurus_by_id(id):
 
 
 @bp.route('/blog-<post_id>', methods=['GET'])
+@page_cache.cached(Post, PostContents, User)
 def blog(post_id):
     page = 'blog'
     if post_id == '0':
@@ -57,14 +61,25 @@ def blog(post_id):
 
 
 @bp.route('/blog', methods=['GET'])
+@page_cache.cached(Post)
 def blog_index():
     page = 'blog'
 
-    posts = Post.get_all()
-    return render_template('blog_index.html', posts=posts, page=page)
+    # every post by default, or ?limit= at a time with a link to the next page
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), current_app.config['MAX_PAGE_SIZE'])
+    try:
+        posts, next_cursor = Post.public_page(limit, request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    return render_template(
+        'blog_index.html', posts=posts, next_cursor=next_cursor, limit=limit, page=page
+    )
 
 
 @bp.route('/resources', methods=['GET'])
+@page_cache.cached(Resource)
 def resources():
     resources = Resource.get_all()
     page = 'resources'
@@ -72,6 +87,7 @@ def resources():
 
 
 @bp.route('/videos')
+@page_cache.cached(Video)
 def videos():
     video_list = Video.get_all()
     page = 'videos'
@@ -1,12 +1,26 @@
 
+import hashlib
+import json
+from collections import defaultdict, deque
 from datetime import datetime
-from flask import current_app, request, url_for, abort
+from flask import has_app_context, request, url_for, abort, render_template
+from markupsafe import Markup
 
-from . import db, guard
+from . import db, guard, shared_cache
+from .cache import ModelCache, version
 
 from .utils.blog_tuple import BlogResponse
+from .utils.block_hash import block_hash
 from .utils.get_preview_text import get_preview_text
+from .utils.columnar import encode_binary, to_columnar
+from .utils.graph import ThesaurusGraph
+from .utils.pagination import Page, decode_cursor, encode_cursor
+from .utils.layout import add_positions
 from .utils.prettify_date import prettify_date
+from .utils.safe_attrs import safe_css, safe_uri
+from .utils.sort_keys import assign_keys, spread_keys
+from .utils.suggest import SuggestionIndex
+from .utils.term_index import TermIndex, normalize
 from .utils.to_json import node_to_json
 
 
@@ -61,88 +75,309 @@ class APIMixin:
     """
     Defines an API for the view to access models.
     Requires that models have an id (int) and order (int) fields defined.
-    Individual models must define to_json, get_all_private, and update_by_id with their own logic.
+    Individual models must define to_json, private_page, and update_by_id with their own logic.
+
+    order is a sparse sort key: entries are spaced ORDER_GAP apart, so a new or
+    moved entry takes a key between its neighbours and nothing else is rewritten.
+    The dashboard only deals in dense positions (0, 1, 2...), which are
+    translated to and from sort keys here.
     """
+    ORDER_GAP = 1024
 
-    def to_json(self):
+    def to_json(self, position=None):
+        """position: where the entry sits in the dashboard list, if the caller knows it"""
         pass
     
     @classmethod
-    def get_all_private(cls):
+    def private_page(cls, limit=None, cursor=None):
+        """returns a Page of the dashboard list, see keyset_page"""
         pass
 
+    @classmethod
+    def get_all_private(cls):
+        return cls.private_page().items
+
     @classmethod
     def update_by_id(cls, id, data):
         pass
 
+    @classmethod
+    def ordered(cls):
+        """query for every entry in display order"""
+        return cls.query.order_by(cls.order, cls.id)
+
+    @classmethod
+    def detail_query(cls):
+        """query used to load a single entry for the editor, override to eager load relationships"""
+        return cls.query
+
+    @classmethod
+    def keyset_page(cls, query, column, limit=None, cursor=None, descending=False):
+        """
+        reads query in (column, id) order, a page at a time. Each page picks
+        up after the last row of the one before, using the index on column
+        rather than an OFFSET that reads and throws away the earlier pages.
+        params
+            query: query whose rows have column and id attributes
+            column: column to sort on
+            limit: int, rows per page, or None for every row
+            cursor: string, the next cursor of the previous page
+            descending: bool
+        returns
+            (rows, next cursor or None on the last page, position of the first row)
+        raises
+            ValueError for a cursor keyset_page didn't make
+        """
+        start = 0
+        if cursor:
+            parse = datetime.fromisoformat if isinstance(column.type, db.DateTime) else None
+            value, id, start = decode_cursor(cursor, parse)
+            if descending:
+                query = query \
+                    .filter(column <= value) \
+                    .filter(db.or_(column < value, cls.id < id))
+            else:
+                query = query \
+                    .filter(column >= value) \
+                    .filter(db.or_(column > value, cls.id > id))
+        if descending:
+            query = query.order_by(column.desc(), cls.id.desc())
+        else:
+            query = query.order_by(column, cls.id)
+        if limit is None:
+            return query.all(), None, start
+
+        # one extra row says whether there is another page
+        rows = query.limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None, start
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(getattr(last, column.key), last.id, start + limit), start
+
+    @classmethod
+    def list_rows(cls, primary, secondary, preview_chars=None, limit=None, cursor=None):
+        """
+        reads the dashboard list as (id, order, published, primary, secondary)
+        rows in display order, rather than loading every entry in full
+        params
+            primary, secondary: columns
+            preview_chars: int, cut secondary down in the database to what
+                get_preview_text(secondary, preview_chars) looks at
+            limit, cursor: see keyset_page
+        returns
+            (rows, next cursor, position of the first row), see keyset_page
+        """
+        if preview_chars is not None:
+            # get_preview_text checks the character just past the limit
+            secondary = db.func.substr(secondary, 1, preview_chars + 1)
+        query = cls.query.with_entities(
+            cls.id, cls.order, cls.published,
+            primary.label('primary'), secondary.label('secondary')
+        )
+        return cls.keyset_page(query, cls.order, limit, cursor)
+
     @classmethod
     def get_by_id(cls, id):
-        entry = cls.query.filter_by(id=id).first_or_404()
+        entry = cls.detail_query().filter_by(id=id).first_or_404()
         return entry.to_json()
 
+    def position(self):
+        """
+        returns where this entry sits in the dashboard list, as 'order' in
+        to_json. This counts the entries before it, a range scan of the order
+        index that grows with the table, so callers that already know the
+        position pass it to to_json instead
+        """
+        cls = type(self)
+        return cls.query.filter(cls._sorts_before(self.order, self.id)).count()
+
     @classmethod
     def get_by_order(cls, order):
-        entry = cls.query.filter_by(order=order).first_or_404()
-        return entry.to_json()
+        entry = cls.ordered().offset(int(order)).first_or_404()
+        return entry.to_json(position=int(order))
 
     @classmethod
     def delete(cls, id):
+        # a gap in the keys is harmless, so no other rows need to change
         to_del = cls.query.filter_by(id=id).first_or_404()
-        order = to_del.order
-        entries = [
-            r for r in cls.query.all()
-            if r.id != id and r.order > order
-        ]
-        for r in entries:
-            r.order -= 1
         db.session.delete(to_del)
-        db.session.add_all(entries)
         db.session.commit()
 
     @classmethod
     def update_batch(cls, data):
-        edited_entries = list()
-        for d in data:
-            entry = cls.query.filter_by(id=d['id']).first_or_404()
-            entry.order = d['order']
-            edited_entries.append(entry)
+        """
+        data: list of {'id', 'order'} dicts, where order is the new position.
+        The dashboard only sends the entries it moved, so every other entry
+        keeps its relative order and fills the remaining positions.
+        Runs in a fixed number of statements whatever the size of data.
+        """
+        moved = {int(d['id']): int(d['order']) for d in data}
+        # lock the targets first and bail out before touching anything
+        found = cls.query \
+            .with_entities(cls.id) \
+            .filter(cls.id.in_(moved)) \
+            .with_for_update() \
+            .all() if moved else []
+        if len(found) != len(moved):
+            abort(404)
+
+        current = cls.ordered().with_entities(cls.id, cls.order).all()
+        placed = deque(sorted(moved, key=moved.get))
+        staying = deque(id for id, _ in current if id not in moved)
+        sequence = []
+        while placed or staying:
+            if placed and (moved[placed[0]] <= len(sequence) or not staying):
+                sequence.append(placed.popleft())
+            else:
+                sequence.append(staying.popleft())
 
-        db.session.add_all(edited_entries)
+        cls._write_keys(assign_keys(sequence, dict(current), cls.ORDER_GAP))
         db.session.commit()
 
     @classmethod
     def new(cls):
-        entry = cls()
+        entry = cls(order=cls._next_order())
         db.session.add(entry)
         db.session.commit()
 
     @classmethod
     def new_by_order(cls, order_id):
-        order = int(order_id)
-        current = cls.query.all()
-        for entry in current:
-            if entry.order >= order:
-                entry.order += 1
-        new_entry = cls(order=order)
-        db.session.add_all([*current, new_entry])
+        new_entry = cls(order=cls._key_at(order_id))
+        db.session.add(new_entry)
         db.session.commit()
 
+    @classmethod
+    def move(cls, id, to):
+        """
+        moves a single entry to position to. Only the moved row is written
+        (plus one shifting UPDATE if its new neighbours are packed).
+        returns a list of {'id', 'order'} for every entry whose position changed
+        """
+        entry = cls.query.filter_by(id=id).with_for_update().first_or_404()
+        old = cls.query.filter(cls._sorts_before(entry.order, entry.id)).count()
+        to = min(max(int(to), 0), cls.query.count() - 1)
+        if to == old:
+            return []
+
+        entry.order = cls._key_at(to, exclude=entry.id)
+        db.session.commit()
+
+        lo, hi = min(old, to), max(old, to)
+        changed = cls.ordered() \
+            .with_entities(cls.id) \
+            .offset(lo) \
+            .limit(hi - lo + 1) \
+            .all()
+        return [{'id': c.id, 'order': lo + i} for i, c in enumerate(changed)]
+
+    @classmethod
+    def rebalance_order(cls, min_gap=2):
+        """
+        respaces every key ORDER_GAP apart, but only once two neighbours have
+        come closer than min_gap. Meant to run in the background, e.g. from
+        `flask rebalance-order` on a cron job.
+        returns the number of rows rewritten
+        """
+        current = cls.ordered().with_entities(cls.id, cls.order).all()
+        keys = [k for _, k in current]
+        if None not in keys and all(b - a >= min_gap for a, b in zip(keys, keys[1:])):
+            return 0
+        changed = {
+            id: cls.ORDER_GAP * (i + 1) for i, (id, key) in enumerate(current)
+            if key != cls.ORDER_GAP * (i + 1)
+        }
+        cls._write_keys(changed)
+        db.session.commit()
+        return len(changed)
+
+    # order helpers, both run inside the caller's transaction
+    @classmethod
+    def _key_at(cls, position, exclude=None):
+        """
+        returns a free key that places an entry at the given position among
+        every entry except exclude. If the neighbours at that position have no
+        room left between them, every later entry is pushed back by ORDER_GAP
+        in a single UPDATE.
+        """
+        others = cls.ordered().with_entities(cls.id, cls.order)
+        if exclude is not None:
+            others = others.filter(cls.id != exclude)
+        position = int(position)
+        if position <= 0:
+            before = None
+            after = others.first()
+        else:
+            neighbours = others.offset(position - 1).limit(2).all()
+            if not neighbours:
+                return cls._next_order()
+            before = neighbours[0]
+            after = neighbours[1] if len(neighbours) > 1 else None
+
+        key = spread_keys(
+            before.order if before else None,
+            after.order if after else None,
+            1, cls.ORDER_GAP
+        )
+        if key is not None:
+            return key[0]
+
+        cls.query \
+            .filter(db.not_(cls._sorts_before(before.order, before.id + 1))) \
+            .update({cls.order: cls.order + cls.ORDER_GAP}, synchronize_session=False)
+        return before.order + cls.ORDER_GAP // 2
+
+    @classmethod
+    def _sorts_before(cls, order, id):
+        """filter for entries that come before (order, id) in display order"""
+        return db.or_(
+            cls.order < order,
+            db.and_(cls.order == order, cls.id < id)
+        )
+
+    @classmethod
+    def _write_keys(cls, keys, chunk_size=500):
+        """
+        writes a {id: key} dict as UPDATE ... SET order = CASE id WHEN ... END,
+        one statement per chunk_size ids to stay under bind parameter limits
+        """
+        ids = list(keys)
+        for i in range(0, len(ids), chunk_size):
+            chunk = {id: keys[id] for id in ids[i:i + chunk_size]}
+            cls.query \
+                .filter(cls.id.in_(chunk)) \
+                .update(
+                    {cls.order: db.case(chunk, value=cls.id)},
+                    synchronize_session=False
+                )
+
+    @classmethod
+    def _next_order(cls):
+        """returns a key one gap past the current last entry"""
+        last = db.session.query(db.func.max(cls.order)) \
+            .with_for_update() \
+            .scalar()
+        return cls.ORDER_GAP if last is None else last + cls.ORDER_GAP
+
 
 class Quote(APIMixin, db.Model):
     __tablename__ = 'quotes'
+    __table_args__ = (
+        db.Index('ix_quotes_published_order', 'published', 'order'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     author = db.Column(db.String(128), nullable=True, default='')
     text = db.Column(db.Text, nullable=True, default='')
     published = db.Column(db.Boolean, default=False)
-    order = db.Column(db.Integer)
+    order = db.Column(db.Integer, index=True)
 
-    def to_json(self):
+    def to_json(self, position=None):
         return {
             'id': self.id,
             'author': self.author,
             'text': self.text,
             'published': self.published,
-            'order': self.order
+            'order': self.position() if position is None else position
         }
 
     def __repr__(self):
@@ -150,25 +385,30 @@ class Quote(APIMixin, db.Model):
 
     @classmethod
     def to_dict_list(cls):
-        return [
-            {'author': q.author, 'text': q.text, 'id': q.id}
-            for q in cls.query \
-                .filter_by(published=True) \
-                .order_by(cls.order)
-                .all()
-        ]
+        return cls.public_page().items
+
+    @classmethod
+    def public_page(cls, limit=None, cursor=None):
+        """returns a Page of published quotes, see keyset_page"""
+        rows, next, _ = cls.keyset_page(
+            cls.query.filter_by(published=True), cls.order, limit, cursor
+        )
+        return Page([
+            {'author': q.author, 'text': q.text, 'id': q.id} for q in rows
+        ], next)
 
     # dashboard api methods
     @classmethod
-    def get_all_private(cls):
-        return [
+    def private_page(cls, limit=None, cursor=None):
+        rows, next, start = cls.list_rows(cls.author, cls.text, 50, limit=limit, cursor=cursor)
+        return Page([
             {
-                'primary': q.author, 
-                'secondary': get_preview_text(q.text, 50),
+                'primary': q.primary,
+                'secondary': get_preview_text(q.secondary, 50),
                 'id': q.id,
                 'published': q.published,
-                'order': q.order
-            } for q in cls.query.all()]
+                'order': start + i
+            } for i, q in enumerate(rows)], next)
 
     @classmethod
     def update_by_id(cls, id, data):
@@ -187,15 +427,26 @@ class Quote(APIMixin, db.Model):
 
 class Post(APIMixin, db.Model):
     __tablename__ = 'posts'
+    __table_args__ = (
+        db.Index('ix_posts_published_date_created', 'published', 'date_created'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     author_id = db.Column(db.Integer, db.ForeignKey(User.id))
     title = db.Column(db.String(128), nullable=True, default='')
     sub_title = db.Column(db.String(128), nullable=True)
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     date_updated = db.Column(db.DateTime, nullable=True)
-    contents = db.relationship('PostContents', backref='post')
+    contents = db.relationship(
+        'PostContents', backref='post', order_by='PostContents.order'
+    )
     published = db.Column(db.Boolean, default=False)
-    order = db.Column(db.Integer)
+    order = db.Column(db.Integer, index=True)
+    # denormalised for the blog index, kept current by refresh_listing
+    preview_text = db.Column(db.Text, nullable=True, default='')
+    pub_date_display = db.Column(db.String(32), nullable=True, default='')
+    author_display = db.Column(db.String(130), nullable=True, default='')
+    # the rendered body of a published post, kept current by refresh_body
+    body_html = db.Column(db.Text, nullable=True)
 
     @property
     def pub_date(self):
@@ -210,9 +461,47 @@ class Post(APIMixin, db.Model):
 
     def get_contents(self):
         """returns a list of dicts for each content element of given post"""
-        post_contents = [p.to_json() for p in self.contents]
-        post_contents.sort(key=lambda p: p['order'])
-        return post_contents
+        return [p.to_json() for p in self.contents]
+
+    def refresh_listing(self, contents=None):
+        """
+        recomputes the fields the blog index shows, so listing posts never
+        loads users or content blocks. contents is a list of block dicts in
+        order, and defaults to get_contents()
+        """
+        if contents is None:
+            contents = self.get_contents()
+        self.preview_text = get_preview_text(' '.join(
+            [c['payload'] or '' for c in contents if c['content_type'] == 'p']
+        ), max_char_count=200)
+        self.pub_date_display = self.pub_date
+        self.author_display = \
+            f'{self.user.first_name} {self.user.last_name}' if self.user else ''
+
+    def refresh_body(self, contents=None):
+        """
+        renders the body of a published post to html once, so viewing it
+        doesn't load or render its content blocks. contents is a list of
+        block dicts in order, and defaults to get_contents()
+        """
+        if not self.published:
+            self.body_html = None
+            return
+        if contents is None:
+            contents = self.get_contents()
+        self.body_html = self._render_body(contents)
+
+    def get_body(self):
+        """returns the post body as html, rendering it if it hasn't been saved"""
+        if self.body_html is None:
+            return Markup(self._render_body(self.get_contents()))
+        return Markup(self.body_html)
+
+    @staticmethod
+    def _render_body(contents):
+        return render_template(
+            'blog_body.html', contents=contents, safe_uri=safe_uri, safe_css=safe_css
+        ).strip()
 
     def get_metadata(self):
         return {
@@ -226,27 +515,51 @@ class Post(APIMixin, db.Model):
     def __repr__(self):
         return f'{self.title} - {self.pub_date} - {self.user.first_name} {self.user.last_name}'
 
+    # relationship loading for each access path:
+    # listings pull many posts, so their contents come in one extra IN query,
+    # single posts pull their user and contents in the same query as the post
+    @classmethod
+    def listing_query(cls):
+        return cls.query.options(
+            db.joinedload(cls.user),
+            db.selectinload(cls.contents)
+        )
+
+    @classmethod
+    def detail_query(cls):
+        return cls.query.options(
+            db.joinedload(cls.user),
+            db.joinedload(cls.contents)
+        )
+
     @classmethod
     def get_all(cls):
-        return [
+        return cls.public_page().items
+
+    @classmethod
+    def public_page(cls, limit=None, cursor=None):
+        """returns a Page of the blog index, newest first, see keyset_page"""
+        query = cls.query \
+            .with_entities(
+                cls.id, cls.date_created, cls.title, cls.author_display,
+                cls.pub_date_display, cls.preview_text
+            ) \
+            .filter_by(published=True)
+        rows, next, _ = cls.keyset_page(query, cls.date_created, limit, cursor, descending=True)
+        return Page([
             {
-                'author': f'{p.user.first_name} {p.user.last_name}',
+                'author': p.author_display,
                 'title': p.title,
-                'pub_date': p.pub_date,
-                'text': get_preview_text(' '.join(
-                    [c.payload for c in p.contents if c.content_type == 'p']
-                ), max_char_count=200),
+                'pub_date': p.pub_date_display,
+                'text': p.preview_text,
                 'id': p.id
             }
-            for p in cls.query \
-                .filter_by(published=True) \
-                .order_by(cls.date_created.desc()) \
-                .all()
-        ]
+            for p in rows
+        ], next)
 
     @classmethod
     def get_all_published_posts(cls):
-        posts = cls.query \
+        posts = cls.listing_query() \
                     .filter_by(published=True) \
                     .order_by(Post.date_created) \
                     .all()
@@ -254,24 +567,21 @@ class Post(APIMixin, db.Model):
 
     @classmethod
     def get_most_recent(cls):
-        print('entered get most recent')
-        
         posts = cls.query \
+            .options(db.joinedload(cls.user)) \
             .filter_by(published=True) \
-            .order_by(Post.date_created).all()
+            .order_by(cls.date_created.desc(), cls.id.desc()) \
+            .limit(2) \
+            .all()
         if not posts:
             content = None
             metadata = None
             prev_post_id = None
         else:
-            latest_post = posts[-1]
-            content = latest_post.get_contents()
+            latest_post = posts[0]
+            content = latest_post.get_body()
             metadata = latest_post.get_metadata()
-        
-            if len(posts) > 1:
-                prev_post_id = posts[-2].id
-            else:
-                prev_post_id = None
+            prev_post_id = posts[1].id if len(posts) > 1 else None
 
         return BlogResponse(
             content=content,
@@ -281,94 +591,120 @@ class Post(APIMixin, db.Model):
 
     @classmethod
     def get_by_id_public(cls, id):
-        post = cls.query.filter_by(id=id).first_or_404()
+        post = cls.query \
+            .options(db.joinedload(cls.user)) \
+            .filter_by(id=id) \
+            .first_or_404()
         if not post.published:
             abort(404)
-        post_id_by_date = [p.id for p in cls.query.order_by(Post.date_created).all()]
-        print(f' all posts: {post_id_by_date}')
-        post_index = post_id_by_date.index(int(id))
-        if post_index == 0:
-            prev_post_id = None
-        else:
-            prev_post_id = post_id_by_date[post_index - 1]
-        if post_index == len(post_id_by_date) - 1:
-            next_post_id = None
-        else:
-            next_post_id = post_id_by_date[post_index + 1]
-        content = post.get_contents()
+        content = post.get_body()
         metadata = post.get_metadata()
         return BlogResponse(
             content=content,
             metadata=metadata,
-            prev_post_id=prev_post_id,
-            next_post_id=next_post_id
+            prev_post_id=post.get_neighbour_id(older=True),
+            next_post_id=post.get_neighbour_id(older=False)
         )
 
+    def get_neighbour_id(self, older):
+        """
+        returns the id of the published post just before (older=True) or just
+        after this one by date_created, or None. Ties are broken on id so every
+        post has exactly one neighbour on each side.
+        """
+        cls = type(self)
+        if older:
+            query = cls.query \
+                .filter(cls.date_created <= self.date_created) \
+                .filter(db.or_(
+                    cls.date_created < self.date_created,
+                    cls.id < self.id
+                )) \
+                .order_by(cls.date_created.desc(), cls.id.desc())
+        else:
+            query = cls.query \
+                .filter(cls.date_created >= self.date_created) \
+                .filter(db.or_(
+                    cls.date_created > self.date_created,
+                    cls.id > self.id
+                )) \
+                .order_by(cls.date_created, cls.id)
+        neighbour = query \
+            .filter_by(published=True) \
+            .with_entities(cls.id) \
+            .first()
+        return neighbour.id if neighbour else None
+
     # dashboard api methods
-    def to_json(self):
-        blog_contents = sorted(self.contents, key=lambda d: d.order)
-        if not blog_contents:
-            blog_contents = []
+    def to_json(self, contents=None, position=None):
         return {
             'title': self.title,
             'sub_title': self.sub_title,
             'date_created': self.date_created,
             'date_updated': self.date_updated,
             'published': self.published,
-            'order': self.order,
-            'contents': [c.to_json() for c in blog_contents]
+            'order': self.position() if position is None else position,
+            'contents': self.get_contents() if contents is None else contents
         }
 
     @classmethod
-    def get_all_private(cls):
-        return [
+    def private_page(cls, limit=None, cursor=None):
+        rows, next, start = cls.list_rows(cls.title, cls.date_created, limit=limit, cursor=cursor)
+        return Page([
             {
-                'primary': d.title, 
-                'secondary': d.date_created,
+                'primary': d.primary,
+                'secondary': d.secondary,
                 'id': d.id,
                 'published': d.published,
-                'order': d.order
-            } for d in cls.query.all()]
+                'order': start + i
+            } for i, d in enumerate(rows)], next)
 
     @classmethod
     def update_by_id(cls, id, data):
-        post = cls.query.filter_by(id=id).first_or_404()
+        # the user is needed for the listing fields, so comes in the same query
+        post = cls.query \
+            .options(db.joinedload(cls.user)) \
+            .filter_by(id=id) \
+            .first_or_404()
 
         post.title = data['title']
         post.sub_title = data['sub_title']
         post.published = data['published']
         if data['update_timestamp']:
             post.date_updated = datetime.utcnow()
-        post.contents = PostContents.update_contents(id, data['contents'])
+        contents = PostContents.update_contents(post.id, data['contents'])
+        post.refresh_listing(contents)
+        post.refresh_body(contents)
 
-        db.session.add(post)
+        # remember, this view needs to return the saved item. It is built
+        # before the commit expires post, so nothing is read back afterwards
+        saved = post.to_json(contents)
         db.session.commit()
-    
-        # remember, this view needs to return the saved item
-        return post.to_json()
+        return saved
 
     # new and new_by_order need to override APIMixin because of user_id
     @classmethod
     def new(cls, user_id):
-        order = len(cls.query.all())
-        post = cls(order=order, author_id=user_id)
+        post = cls(order=cls._next_order(), author_id=user_id)
         db.session.add(post)
+        db.session.flush()
+        post.refresh_listing([])
         db.session.commit()
 
     @classmethod
     def new_by_order(cls, order_id, user_id):
-        order = int(order_id)
-        cur_posts = cls.query.all()
-        for r in cur_posts:
-            if r.order >= order:
-                r.order += 1
-        new_post = cls(order=order, author_id=user_id)
-        db.session.add_all([*cur_posts, new_post])
+        new_post = cls(order=cls._key_at(order_id), author_id=user_id)
+        db.session.add(new_post)
+        db.session.flush()
+        new_post.refresh_listing([])
         db.session.commit()
 
 
 class PostContents(db.Model):
     __tablename__ = 'post_contents'
+    __table_args__ = (
+        db.Index('ix_post_contents_post_id_order', 'post_id', 'order'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     post_id = db.Column(db.Integer, db.ForeignKey(Post.id))
     order = db.Column(db.Integer)
@@ -377,57 +713,95 @@ class PostContents(db.Model):
     uri = db.Column(db.String(128))
     css = db.Column(db.String(128))
     published = db.Column(db.Boolean, default=False)
+    # block_hash of the content, kept current by _hash_block
+    content_hash = db.Column(db.String(40), nullable=True)
+
+    JSON_FIELDS = ('id', 'post_id', 'order', 'content_type', 'payload', 'uri', 'css')
 
     def to_json(self):
-        return {
-            'id': self.id,
-            'post_id': self.post_id,
-            'order': self.order,
-            'content_type': self.content_type,
-            'payload': self.payload,
-            'uri': self.uri,
-            'css': self.css,
-        }
+        return {field: getattr(self, field) for field in self.JSON_FIELDS}
 
     @classmethod
     def update_contents(cls, id, contents):
-        cur_contents = cls.query.filter_by(post_id=id).all()
-        contents_dict = {c['id']: c for c in contents if c['id']}
-
-        # no id? create new PostContents row
-        to_add = [
-            PostContents(
-                order=c['order'],
-                content_type=c['content_type'],
-                payload=c['payload'],
-                uri=c['uri'],
-                css=c['css'],
-                post_id=c['post_id']
-                )
-            for c in contents if not c['id']
-        ]
-
-        to_del = []
-        for pc in cur_contents:
-
-            if pc.id in contents_dict.keys():
-                d = contents_dict[pc.id]
-                pc.order = d['order']
-                pc.content_type = d['content_type']
-                pc.payload = d['payload']
-                pc.uri = d['uri']
-                pc.css = d['css']
-                to_add.append(pc)
+        """
+        saves the blocks of post id to match contents, the full list the
+        editor sent. Blocks are matched by id, and only those whose content
+        hash or order changed are written. New blocks are inserted and
+        missing ones deleted in bulk. Nothing is committed, so the caller
+        saves the post in the same transaction.
+        params
+            id: int, the post's id
+            contents: list of dicts, as from to_json
+        returns
+            list of to_json dicts of the saved blocks, in order
+        """
+        current = {
+            r.id: r for r in cls.query
+                .with_entities(cls.id, cls.order, cls.content_hash)
+                .filter_by(post_id=id)
+        }
 
+        saved, to_add, changed, moved = [], [], [], []
+        for c in contents:
+            row = {
+                'post_id': id,
+                'order': c['order'],
+                'content_type': c['content_type'],
+                'payload': c['payload'],
+                'uri': c['uri'],
+                'css': c['css'],
+                'content_hash': block_hash(c['content_type'], c['payload'], c['uri'], c['css'])
+            }
+            if not c['id']:
+                # no id? create new PostContents row
+                to_add.append(row)
+            elif c['id'] in current:
+                old = current.pop(c['id'])
+                row['id'] = old.id
+                if old.content_hash != row['content_hash']:
+                    changed.append(row)
+                elif old.order != row['order']:
+                    moved.append({'id': old.id, 'order': row['order']})
             else:
-                to_del.append(pc)
-                
-        for pc in to_del:
-            db.session.delete(pc)
-        db.session.add_all(to_add)
-        db.session.commit()
-        return to_add
-
+                # not a block of this post (any more), nothing to save
+                continue
+            saved.append(row)
+
+        # whatever wasn't sent was removed in the editor
+        if current:
+            cls.query \
+                .filter(cls.id.in_(list(current))) \
+                .delete(synchronize_session=False)
+        if changed:
+            db.session.bulk_update_mappings(cls, changed)
+        if moved:
+            db.session.bulk_update_mappings(cls, moved)
+        if to_add:
+            # one executemany, rather than an INSERT per row to get each id
+            db.session.bulk_insert_mappings(cls, to_add)
+            # the editor needs the new ids back, or the next save adds them
+            # again. The post's other rows were all sent back above, so
+            # every row not among them is new; identical blocks take their
+            # ids in the order they were inserted
+            kept = [row['id'] for row in saved if 'id' in row]
+            hashes = sorted({row['content_hash'] for row in to_add})
+            query = cls.query \
+                .with_entities(cls.id, cls.content_hash, cls.order) \
+                .filter(cls.post_id == id) \
+                .filter(cls.content_hash.in_(hashes))
+            if kept:
+                query = query.filter(cls.id.notin_(kept))
+            new_ids = defaultdict(list)
+            for row in query.order_by(cls.id):
+                new_ids[row.content_hash, row.order].append(row.id)
+            for row in to_add:
+                row['id'] = new_ids[row['content_hash'], row['order']].pop(0)
+
+        saved.sort(key=lambda row: row['order'] or 0)
+        return [
+            {field: row.get(field) for field in cls.JSON_FIELDS}
+            for row in saved
+        ]
 
     @classmethod
     def edit_post_contents_by_id(cls, id, data):
@@ -447,6 +821,13 @@ class PostContents(db.Model):
         return p
 
 
+@db.event.listens_for(PostContents, 'before_insert')
+@db.event.listens_for(PostContents, 'before_update')
+def _hash_block(mapper, connection, target):
+    # bulk saves in update_contents set the hash themselves
+    target.content_hash = block_hash(target.content_type, target.payload, target.uri, target.css)
+
+
 class Node(APIMixin, db.Model):
     """
     params:
@@ -462,97 +843,102 @@ class Node(APIMixin, db.Model):
         del_antonym(int: <index_to_delete>)
     """
     __tablename__ = 'nodes'
+    __table_args__ = (
+        db.Index('ix_nodes_published_order', 'published', 'order'),
+        db.Index('ix_nodes_published_title', 'published', 'title'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(32), nullable=True, default='')
+    title = db.Column(db.String(32), nullable=True, default='', index=True)
     definition = db.Column(db.Text(), nullable=True, default='')
     example = db.Column(db.Text(), nullable=True, default='')
     published = db.Column(db.Boolean, default=False)
-    order = db.Column(db.Integer)
+    order = db.Column(db.Integer, index=True)
 
-    _synonyms = db.Column(db.Text(), nullable=True)
-    _antonyms = db.Column(db.Text(), nullable=True)
+    links = db.relationship(
+        'NodeLink', backref='source', order_by='NodeLink.position',
+        cascade='all, delete-orphan'
+    )
     # methods for getting and setting synonyms and antonyms
-    # both synonyms and antonyms can be treated as a list, and 
-    # internally will be converted to/from a comma separated string
+    # both synonyms and antonyms can be treated as a list of titles, and
+    # internally are stored as NodeLink rows
+    def _links_of(self, kind):
+        return [l for l in self.links if l.kind == kind]
+
+    def _set_links(self, kind, titles):
+        self.links = [l for l in self.links if l.kind != kind] + [
+            NodeLink(kind=kind, target=t, position=i) for i, t in enumerate(titles)
+        ]
+
+    def _add_link(self, kind, value):
+        positions = [l.position for l in self._links_of(kind)]
+        self.links.append(NodeLink(
+            kind=kind, target=value, position=max(positions) + 1 if positions else 0
+        ))
+
+    def _del_link(self, kind, index):
+        links = self._links_of(kind)
+        if not links:
+            return False
+        self.links.remove(links[index])
+        return True
+
     @property
     def synonyms(self):
-        if self._synonyms:
-            return self._synonyms.split(',')
-        return []
+        return [l.target for l in self._links_of('synonym')]
 
     @synonyms.setter
     def synonyms(self, synonyms_list):
-        self._synonyms = ','.join(synonyms_list)
+        self._set_links('synonym', synonyms_list)
     
     def add_synonym(self, value):
-        if self._synonyms:
-            self._synonyms += ',' + value
-        else:
-            self._synonyms = value
-        print(f'synonyms is now {self._synonyms}')
+        self._add_link('synonym', value)
 
     def del_synonym(self, index):
-        if not self._synonyms:
-            print('no synonyms to delete')
-            return False
-        if index > len(self.synonyms):
-            raise IndexError()
-        updated_synonyms = self.synonyms
-        del updated_synonyms[index]
-        self._synonyms = ''
-        for w in updated_synonyms:
-            self.add_synonym(w)
-        return True
+        return self._del_link('synonym', index)
 
     @property
     def antonyms(self):
-        if self._antonyms:
-            return self._antonyms.split(',')
-        return []
+        return [l.target for l in self._links_of('antonym')]
 
     @antonyms.setter
     def antonyms(self, antonyms_list):
-        self._antonyms = ','.join(antonyms_list)
+        self._set_links('antonym', antonyms_list)
     
     def add_antonym(self, value):
-        if self._antonyms:
-            self._antonyms += ',' + value
-        else:
-            self._antonyms = value
-        print(f'antonyms is now {self._antonyms}')
+        self._add_link('antonym', value)
 
     def del_antonym(self, index):
-        if not self._antonyms:
-            print('no antonyms to delete')
-            return False
-        if index > len(self.antonyms):
-            raise IndexError()
-        updated_antonyms = self.antonyms
-        del updated_antonyms[index]
-        self._antonyms = ''
-        for w in updated_antonyms:
-            self.add_antonym(w)
-        return True
+        return self._del_link('antonym', index)
+
+    @classmethod
+    def linked_from(cls, title, kind=None):
+        """returns every node that lists title as a synonym (or antonym, or either)"""
+        query = cls.query.join(cls.links).filter(NodeLink.target == title)
+        if kind:
+            query = query.filter(NodeLink.kind == kind)
+        return query.all()
 
     def __repr__(self):
         return f'{self.title}\nSynonyms: {self.synonyms}\nAntonyms: {self.antonyms}'
 
+    @classmethod
+    def detail_query(cls):
+        return cls.query.options(db.joinedload(cls.links))
+
     # alt thesaurus api
     @classmethod
     def get_alt_term(cls, id):
         if not id:
-            nodes = cls.query \
-                .filter_by(published=True) \
-                .order_by(cls.order) \
-                .all()
-            if not nodes: return None
             # take the one with the lowest order
-            node = nodes[0]
+            node = cls.query \
+                .filter_by(published=True) \
+                .order_by(cls.order, cls.id) \
+                .first()
+            if not node: return None
         else:
-            node = cls.query.filter_by(id=id).first_or_404()
+            node = cls.detail_query().filter_by(id=id).first_or_404()
 
-        all_nodes = cls.query.filter_by(published=True).all()
-        node_dict = {n.title: n.id for n in all_nodes}
+        node_dict = title_index.get()
 
         return {           
             'id': node.id,
@@ -560,8 +946,8 @@ class Node(APIMixin, db.Model):
             'text': node.text,
             'example': node.example,
             'published': node.published,
-            'synonyms': [(n, node_dict.get(n, None)) for n in node.synonyms],
-            'antonyms': [(n, node_dict.get(n, None)) for n in node.antonyms]
+            'synonyms': [(n, node_dict.get(normalize(n))) for n in node.synonyms],
+            'antonyms': [(n, node_dict.get(normalize(n))) for n in node.antonyms]
         }
 
     # create text property so api is consistent
@@ -573,9 +959,12 @@ class Node(APIMixin, db.Model):
     def text(self, val):
         self.definition = val
 
-    def to_json(self):
-        word_list = Node.get_all_words()
-        return {
+    def to_json(self, include_words=True, position=None):
+        """
+        include_words=False leaves out the vocabulary, for editors that fetch
+        it once from /api/thesaurus/words instead
+        """
+        data = {
             'id': self.id,
             'title': self.title,
             'text': self.text,
@@ -583,35 +972,133 @@ class Node(APIMixin, db.Model):
             'published': self.published,
             'synonyms': self.synonyms,
             'antonyms': self.antonyms,
-            'word_list': word_list,
-            'order': self.order
+            'order': self.position() if position is None else position
         }
+        if include_words:
+            data['word_list'] = Node.get_all_words()
+        return data
 
     # API access point
     @classmethod
     def to_dict(cls):
-        """Returns a dictionary of all available Node data."""
+        """
+        Returns a dictionary of all available Node data, with x and y laid
+        out for every node so the page needn't run the simulation itself.
+        """
         data = cls.query \
+            .options(db.selectinload(cls.links)) \
             .filter_by(published=True) \
+            .order_by(cls.order, cls.id) \
             .all()
-        return {d.title: node_to_json(d) for d in data}
+        # the visual thesaurus opens on the node with order 0, so send positions
+        return add_positions(
+            {d.title: node_to_json(d, order=i) for i, d in enumerate(data)}
+        )
 
-    # dashboard api methods
     @classmethod
-    def get_all_private(cls):
+    def get_graph_snapshot(cls, format='json'):
+        """
+        returns (etag, body), the graph serialized as bytes in one of
+        GRAPH_FORMATS: to_dict as json, or utils.columnar as json or binary.
+        From the shared cache, body is a memoryview of the mapped bytes
+        """
+        store = shared_cache.store
+        if store is None:
+            return graph_snapshots[format].get()
+
+        # built once for every worker on the host, rather than kept by each
+        def build():
+            etag, body = _build_graph_snapshot(format)
+            return {'etag': etag}, body
+        meta, body = store.fetch(f'graph:{format}', build, cls, NodeLink)
+        return meta['etag'], body
+
+    @classmethod
+    def get_neighbourhood(cls, title, depth=1):
+        """
+        returns the part of to_dict within depth links of title, or None if
+        title is not a published node
+        """
+        graph = graph_index.get()
+        if title not in graph:
+            return None
+        return add_positions({
+            n.title: node_to_json(n)
+            for n in graph.neighbourhood(title, depth)
+        })
+
+    @classmethod
+    def get_path(cls, start, end):
+        """
+        returns the shortest chain of links from start to end as a list of
+        {'title', 'kind'} steps, where kind is the link into that title (None
+        for start), or None if there is no such chain
+        """
+        graph = graph_index.get()
+        path = graph.shortest_path(start, end)
+        if path is None:
+            return None
+        return [{'title': start, 'kind': None}] + [
+            {'title': b, 'kind': graph.link_kind(a, b)}
+            for a, b in zip(path, path[1:])
+        ]
+
+    @classmethod
+    def search(cls, q, limit=10, published_only=True):
+        """
+        returns up to limit {'id', 'title'} dicts for terms starting with q,
+        or failing that spelled like it, ignoring case and spacing
+        """
         return [
+            {'id': id, 'title': title}
+            for id, title in term_index.get().search(q, limit, published_only)
+        ]
+
+    @classmethod
+    def get_suggestions(cls, id, limit=10):
+        """
+        returns terms the node could link to, scored by how many paths of two
+        links reach them, see SuggestionIndex
+        """
+        node = cls.query.filter_by(id=id).first_or_404()
+        suggestions = suggestion_index.get().suggest(node.id, limit)
+        return {
+            kind: [{'title': title, 'score': score} for title, score in terms]
+            for kind, terms in suggestions.items()
+        }
+
+    @classmethod
+    def get_graph_stats(cls):
+        """returns connectivity and broken link stats, see ThesaurusGraph.stats"""
+        return graph_index.get().stats
+
+    # dashboard api methods
+    @classmethod
+    def private_page(cls, limit=None, cursor=None):
+        rows, next, start = cls.list_rows(cls.title, cls.definition, 50, limit=limit, cursor=cursor)
+        return Page([
             {
-                'primary': d.title, 
-                'secondary': get_preview_text(d.text, 50),
+                'primary': d.primary,
+                'secondary': get_preview_text(d.secondary, 50),
                 'id': d.id,
                 'published': d.published,
-                'order': d.order
-            } for d in cls.query.all()]
+                'order': start + i
+            } for i, d in enumerate(rows)], next)
 
     @classmethod
-    def update_by_id(cls, id, data):
-        node = cls.query.filter_by(id=id).first_or_404()
+    def get_by_id(cls, id, include_words=True):
+        node = cls.detail_query().filter_by(id=id).first_or_404()
+        return node.to_json(include_words)
 
+    @classmethod
+    def update_by_id(cls, id, data, include_words=True):
+        node = cls.detail_query().filter_by(id=id).first_or_404()
+
+        if node.title and data['title'] != node.title:
+            # links are stored by title, so follow the rename
+            NodeLink.query \
+                .filter_by(target=node.title) \
+                .update({NodeLink.target: data['title']}, synchronize_session=False)
         node.title = data['title']
         node.text = data['text']
         node.published = data['published']
@@ -623,18 +1110,44 @@ class Node(APIMixin, db.Model):
         db.session.commit()
     
         # remember, this view needs to return the saved item
-        return node.to_json()
+        return node.to_json(include_words)
 
 
     @classmethod
     def get_all_words(cls):
-        return [w.title for w in cls.query.all()]
+        """returns the shared, cached list of every title. Don't modify it!"""
+        return word_list.get()[1]
+
+    @classmethod
+    def get_word_list(cls):
+        """returns (etag, titles), where etag is a hash of the titles"""
+        return word_list.get()
+
+
+class NodeLink(db.Model):
+    """
+    one synonym or antonym of a Node. target is a title rather than an id,
+    since a link may name a word that has no node (yet)
+    """
+    __tablename__ = 'node_links'
+    __table_args__ = (
+        db.Index('ix_node_links_source_id_kind_position', 'source_id', 'kind', 'position'),
+        db.Index('ix_node_links_target_kind', 'target', 'kind'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    source_id = db.Column(db.Integer, db.ForeignKey(Node.id), nullable=False)
+    target = db.Column(db.String(32), nullable=False)
+    kind = db.Column(db.String(8), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
 
 
 class Video(APIMixin, db.Model):
     __tablename__ = 'videos'
+    __table_args__ = (
+        db.Index('ix_videos_published_order', 'published', 'order'),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    order = db.Column(db.Integer)
+    order = db.Column(db.Integer, index=True)
     url = db.Column(db.String(128), default='')
     title = db.Column(db.String(128), default='')
     description = db.Column(db.Text(), default='')
@@ -648,7 +1161,8 @@ class Video(APIMixin, db.Model):
     def text(self, val):
         self.description = val
 
-    def to_json(self):
+    def to_json(self, position=None):
+        # the video editor doesn't show order, so position goes unused
         return {
             'id': self.id,
             'uri': self.url,
@@ -670,15 +1184,16 @@ class Video(APIMixin, db.Model):
 
     # dashboard api methods
     @classmethod
-    def get_all_private(cls):
-        return [
+    def private_page(cls, limit=None, cursor=None):
+        rows, next, start = cls.list_rows(cls.title, cls.description, 50, limit=limit, cursor=cursor)
+        return Page([
             {
-                'primary': v.title, 
-                'secondary': get_preview_text(v.text, 50),
+                'primary': v.primary,
+                'secondary': get_preview_text(v.secondary, 50),
                 'id': v.id,
                 'published': v.published,
-                'order': v.order
-            } for v in cls.query.all()]
+                'order': start + i
+            } for i, v in enumerate(rows)], next)
 
     @classmethod
     def update_by_id(cls, id, data):
@@ -698,20 +1213,23 @@ class Video(APIMixin, db.Model):
 
 class Resource(APIMixin, db.Model):
     __tablename__ = 'resources'
+    __table_args__ = (
+        db.Index('ix_resources_published_order', 'published', 'order'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(128), default='')
     text = db.Column(db.Text(), default='')
-    order = db.Column(db.Integer)
+    order = db.Column(db.Integer, index=True)
     uri = db.Column(db.String(128), default='')
     uri_title = db.Column(db.String(128), default='')
     published = db.Column(db.Boolean, default=False)
 
-    def to_json(self):
+    def to_json(self, position=None):
         return {
             'title': self.title,
             'id': self.id,
             'text': self.text,
-            'order': self.order,
+            'order': self.position() if position is None else position,
             'uri': self.uri,
             'uri_title': self.uri_title,
             'published': self.published
@@ -723,13 +1241,13 @@ class Resource(APIMixin, db.Model):
             'title': r.title,
             'text': r.text,
             'id': r.id,
-            'order': r.order,
+            'order': i,
             'uri': r.uri,
             'uri_title': r.uri_title
-        } for r in cls.query \
+        } for i, r in enumerate(cls.query \
                 .filter_by(published=True) \
-                .order_by(Resource.order) \
-                .all()]
+                .order_by(Resource.order, Resource.id) \
+                .all())]
 
         if not len(results):
             return None
@@ -737,29 +1255,256 @@ class Resource(APIMixin, db.Model):
 
     # dashboard api methods
     @classmethod
-    def get_all_private(cls):
-        return [
+    def private_page(cls, limit=None, cursor=None):
+        rows, next, start = cls.list_rows(cls.title, cls.text, 50, limit=limit, cursor=cursor)
+        return Page([
             {
-                'primary': r.title, 
-                'secondary': get_preview_text(r.text, 50),
+                'primary': r.primary,
+                'secondary': get_preview_text(r.secondary, 50),
                 'id': r.id,
                 'published': r.published,
-                'order': r.order
-            } for r in cls.query.all()]
+                'order': start + i
+            } for i, r in enumerate(rows)], next)
 
     @classmethod
     def update_by_id(cls, id, data):
-        resource = cls.query.filter_by(id=id).first_or_404()
+        # locked, as move does, so a reorder can't land between reading the
+        # neighbours and saving the new key
+        resource = cls.query.filter_by(id=id).with_for_update().first_or_404()
 
         resource.title = data['title']
         resource.text = data['text']
-        resource.order = data['order']
         resource.uri = data['uri']
         resource.uri_title = data['uri_title']
         resource.published = data['published']
+        # order is a position, as everywhere in the dashboard, so it becomes
+        # a key between its new neighbours, saved with the rest of the edit
+        if 'order' in data and int(data['order']) != resource.position():
+            resource.order = cls._key_at(data['order'], exclude=resource.id)
 
         db.session.add(resource)
         db.session.commit()
 
         # remember, this view needs to return the saved item
         return resource.to_json()
+
+
+class CacheGeneration(db.Model):
+    """
+    params:
+        name: string, a table name
+        generation: int, bumped by every commit that writes to the table
+    bumped before every commit that writes. The shared cache checks its
+    payloads against these, as do ModelCaches given a check, so every worker
+    process sees the same staleness, see shared_cache.SharedStore
+    """
+    __tablename__ = 'cache_generations'
+    name = db.Column(db.String(64), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(cls):
+        """returns {table name: generation}"""
+        return dict(cls.query.with_entities(cls.name, cls.generation))
+
+    @classmethod
+    def of(cls, *models):
+        """returns the generation of each model, in one query"""
+        names = [m.__tablename__ for m in models]
+        generations = dict(
+            cls.query
+                .with_entities(cls.name, cls.generation)
+                .filter(cls.name.in_(names))
+        )
+        return tuple(generations.get(name, 0) for name in names)
+
+    @classmethod
+    def bump(cls, tables):
+        """
+        adds one to the generation of each table, in the current transaction.
+        Every table has a row from the start (see _seed_generations, and the
+        migration that made the table), so this is a single UPDATE. A
+        migration adding a table should add its row too: rows missing here
+        are inserted, which two workers committing at once can both try
+        """
+        tables = sorted(tables)
+        table = cls.__table__
+        result = db.session.execute(
+            table.update()
+                .where(table.c.name.in_(tables))
+                .values(generation=table.c.generation + 1)
+        )
+        if result.rowcount == len(tables):
+            return
+        known = {
+            name for name, in db.session.execute(
+                db.select([table.c.name]).where(table.c.name.in_(tables))
+            )
+        }
+        db.session.execute(table.insert(), [
+            {'name': name, 'generation': 1} for name in tables if name not in known
+        ])
+
+
+@db.event.listens_for(CacheGeneration.__table__, 'after_create')
+def _seed_generations(target, connection, **kw):
+    # as the cache_generations migration does, for databases made by create_all
+    connection.execute(target.insert(), [
+        {'name': name, 'generation': 0}
+        for name in sorted(target.metadata.tables) if name != target.name
+    ])
+
+
+# normalized title -> id of every published node, shared by every request in
+# this process and rebuilt after the next commit that writes to nodes
+title_index = ModelCache(
+    lambda: {
+        normalize(title): id for title, id in Node.query
+            .with_entities(Node.title, Node.id)
+            .filter_by(published=True)
+            .order_by(Node.order.desc(), Node.id.desc())
+    },
+    Node
+)
+
+
+def _build_word_list():
+    words = [
+        w.title for w in Node.query
+            .with_entities(Node.title)
+            .order_by(Node.order, Node.id)
+    ]
+    etag = hashlib.sha1(json.dumps(words).encode()).hexdigest()
+    return etag, words
+
+
+# (etag, titles) of every node, published or not, for the dashboard editor.
+# Checked against the generation of nodes, so a worker that didn't make an
+# edit never answers If-None-Match with the etag of the list before it
+word_list = ModelCache(
+    _build_word_list, Node, check=lambda: CacheGeneration.of(Node)
+)
+
+
+def _build_graph_snapshot(format):
+    if format == 'json':
+        data = Node.to_dict()
+    else:
+        data = to_columnar(graph_index.get().nodes.values())
+        if format == 'binary':
+            body = encode_binary(data)
+            return hashlib.sha1(body).hexdigest(), body
+    # sorted and compact, so the same graph always hashes the same
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha1(body).hexdigest(), body
+
+
+GRAPH_FORMATS = ('json', 'columnar', 'binary')
+
+# format -> (etag, bytes) of the visual thesaurus graph, see get_graph_snapshot.
+# Only public views send it, so while one thread rebuilds it after an edit the
+# others keep sending the previous graph. Its etag is checked against the
+# generations as word_list's is
+graph_snapshots = {
+    format: ModelCache(
+        lambda format=format: _build_graph_snapshot(format), Node, NodeLink,
+        serve_stale=True, check=lambda: CacheGeneration.of(Node, NodeLink)
+    )
+    for format in GRAPH_FORMATS
+}
+
+
+def _build_graph_index():
+    nodes = Node.query \
+        .with_entities(Node.id, Node.title, Node.definition, Node.example) \
+        .filter_by(published=True) \
+        .order_by(Node.order, Node.id)
+    links = NodeLink.query \
+        .with_entities(NodeLink.source_id, NodeLink.kind, NodeLink.target) \
+        .join(Node) \
+        .filter(Node.published == True) \
+        .order_by(NodeLink.source_id, NodeLink.position)
+    return ThesaurusGraph(nodes, links)
+
+
+# adjacency of the published thesaurus, see utils.graph
+graph_index = ModelCache(_build_graph_index, Node, NodeLink)
+
+
+# two link co-occurrence scores across every node, published or not
+suggestion_index = ModelCache(
+    lambda: SuggestionIndex(
+        Node.query
+            .with_entities(Node.id, Node.title)
+            .order_by(Node.order, Node.id),
+        NodeLink.query
+            .with_entities(NodeLink.source_id, NodeLink.kind, NodeLink.target)
+            .order_by(NodeLink.source_id, NodeLink.position)
+    ),
+    Node, NodeLink
+)
+
+
+# searchable titles of every node. Rather than being rebuilt after each edit,
+# it is patched with the nodes this process flushed, see _patch_term_index
+term_index = ModelCache(
+    lambda: TermIndex(Node.query.with_entities(Node.id, Node.title, Node.published)),
+    Node
+)
+
+
+@db.event.listens_for(db.Session, 'after_begin')
+def _remember_node_version(session, transaction, connection):
+    session.info.setdefault('nodes_version', version(Node))
+
+
+@db.event.listens_for(db.Session, 'after_flush')
+def _record_node_changes(session, flush_context):
+    changes = session.info.setdefault('node_changes', [])
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Node):
+            changes.append((obj.id, obj.title, obj.published))
+    for obj in session.deleted:
+        if isinstance(obj, Node):
+            changes.append((obj.id, None, None))
+
+
+@db.event.listens_for(db.Session, 'after_commit')
+def _patch_term_index(session):
+    # the only statements run on nodes outside of a flush rewrite order, which
+    # the index doesn't hold, so the flushed rows are everything that changed
+    since = session.info.pop('nodes_version', None)
+    changes = session.info.pop('node_changes', [])
+    if since is None:
+        return
+
+    def apply(index):
+        # searches may be running on index, so the edits go to a copy
+        index = index.copy()
+        for id, title, published in changes:
+            if title is None:
+                index.remove(id)
+            else:
+                index.add(id, title, published)
+        return index
+    term_index.patch(since, apply)
+
+
+@db.event.listens_for(db.Session, 'after_rollback')
+def _forget_node_changes(session):
+    session.info.pop('nodes_version', None)
+    session.info.pop('node_changes', None)
+
+
+@db.event.listens_for(db.Session, 'before_commit')
+def _bump_generations(session):
+    # the shared cache, and the ModelCaches that check them, read these to see
+    # every worker's commits, see CacheGeneration
+    if not has_app_context():
+        return
+    # flushed now rather than by the commit, so every table written is known
+    session.flush()
+    tables = session.connection().info.get('written_tables', set()) \
+        - {CacheGeneration.__tablename__}
+    if tables:
+        CacheGeneration.bump(tables)
@@ -0,0 +1,243 @@
+"""
+Host-level cache shared by every worker process.
+
+Each payload is a file under SHARED_CACHE_PATH that workers memory map, so
+however many workers serve it the operating system holds one copy. A payload
+is stamped with the generations, kept in the cache_generations table, of the
+models it was built from. Commits bump the generations of the tables they
+wrote (see models._bump_generations), so a payload one worker rebuilds after
+an edit is current for every other worker too.
+
+Rebuilt payloads are written to a temporary file and renamed over the old
+one. Workers still holding the old mapping keep reading it untouched, and
+pick up the new file the next time they look.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from flask import current_app
+
+from .cache import PageEntry, SingleFlight, fresh_reads, version
+
+MAGIC = b'BSC1'
+# magic, then the length of the json meta that comes before the payload
+HEADER = struct.Struct('<4sI')
+
+
+class SharedStore:
+    """
+    Payloads mapped from files in path, with the database generations they
+    are checked against.
+    params
+        path: string, a directory every worker on the host can write to
+        interval: seconds between reading the generations. Commits made by
+            this process are seen straight away, other workers' within interval
+        size: int, most payloads kept, the least recently written go first
+    Rebuilds are coalesced across every worker through lock files in
+    path/locks, see SingleFlight. They read from the database rather than
+    from this process's ModelCaches (see fresh_reads), as what one worker
+    builds is served to every other as current.
+    """
+
+    shared = True
+
+    def __init__(self, path, interval=1, size=None):
+        self.path = path
+        self.interval = interval
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        os.makedirs(path, exist_ok=True)
+        self.flight = SingleFlight(os.path.join(path, 'locks'))
+        # key -> (file identity, meta, payload view), for the files this
+        # process has mapped
+        self._maps = {}
+        self._generations = {}
+        self._read_at = 0
+        # models -> their local versions when the generations were read
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def version(self, *models):
+        """returns the generation of each model, as stored in the database"""
+        from .models import CacheGeneration
+
+        # a commit from this process moves the local versions as well
+        local = version(*models)
+        now = time.monotonic()
+        with self._lock:
+            stale = local != self._seen.get(models) or now - self._read_at > self.interval
+        if stale:
+            # read outside the lock, so threads don't queue on the database
+            generations = CacheGeneration.current()
+        with self._lock:
+            if stale:
+                self._generations = generations
+                self._read_at = now
+                self._seen = {}
+            self._seen[models] = local
+            generations = self._generations
+        return tuple(
+            generations.get(getattr(m, '__tablename__', m), 0) for m in models
+        )
+
+    def _file(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.path, f'{name}.bin')
+
+    def read(self, key):
+        """returns (meta, payload) stored for key, or None"""
+        path = self._file(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._maps.pop(key, None)
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        held = self._maps.get(key)
+        if held is not None and held[0] == identity:
+            return held[1], held[2]
+
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        view = memoryview(mapped)
+        magic, size = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            return None
+        meta = json.loads(bytes(view[HEADER.size:HEADER.size + size]))
+        payload = view[HEADER.size + size:]
+        with self._lock:
+            # a replaced mapping is unmapped once nothing refers to it
+            self._maps[key] = (identity, meta, payload)
+        return meta, payload
+
+    def write(self, key, meta, payload):
+        """stores payload for key, and returns (meta, mapped payload)"""
+        encoded = json.dumps(meta, separators=(',', ':')).encode()
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, len(encoded)))
+                f.write(encoded)
+                f.write(payload)
+            os.replace(tmp, self._file(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if self.size is not None:
+            self._prune()
+        # another worker may already have replaced or pruned it
+        return self.read(key) or (meta, payload)
+
+    def _files(self):
+        return [
+            os.path.join(self.path, name)
+            for name in os.listdir(self.path) if name.endswith('.bin')
+        ]
+
+    def _prune(self):
+        files = self._files()
+        if len(files) <= self.size:
+            return
+        by_age = []
+        for path in files:
+            try:
+                by_age.append((os.stat(path).st_mtime_ns, path))
+            except FileNotFoundError:
+                pass
+        by_age.sort()
+        # lock files stay: removing one a worker holds would let the next
+        # worker lock a new file under the same name, and build alongside it
+        for _, path in by_age[:len(by_age) - self.size]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def fetch(self, key, build, *models):
+        """
+        returns (meta, payload) for key, built at the current generations of
+        models by whichever worker asked first. While it builds, the other
+        workers are sent the previous payload, or wait if there is none.
+        build() returns (meta, bytes)
+        """
+        versions = list(self.version(*models))
+        stored = self.read(key)
+        if stored is not None and stored[0].get('versions') == versions:
+            self.hits += 1
+            return stored
+
+        with self.flight.claim(key, wait=stored is None) as leader:
+            if not leader:
+                self.stale += 1
+                return stored
+            # another worker may have built it while this one waited
+            stored = self.read(key)
+            if stored is not None and stored[0].get('versions') == versions:
+                self.hits += 1
+                return stored
+            self.misses += 1
+            with fresh_reads():
+                meta, payload = build()
+            return self.write(key, dict(meta, versions=versions), payload)
+
+    # the interface PageCache expects of a store, which keeps its pages in a
+    # SharedStore of their own
+    def get(self, key):
+        stored = self.read(key)
+        if stored is None:
+            return None
+        meta, payload = stored
+        return PageEntry(
+            tuple(meta['versions']), meta['stored_at'], meta['status'],
+            [tuple(h) for h in meta['headers']], payload
+        )
+
+    def set(self, key, entry):
+        self.write(key, {
+            'versions': list(entry.versions),
+            'stored_at': entry.stored_at,
+            'status': entry.status,
+            'headers': entry.headers,
+        }, entry.body)
+
+    def __len__(self):
+        return len(self._files())
+
+    def clear(self):
+        for path in self._files():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+class SharedCache:
+    """
+    Flask extension giving views the SharedStore of their app.
+
+    config
+        SHARED_CACHE_PATH: string, or None to turn the shared tier off
+        SHARED_CACHE_INTERVAL: seconds, see SharedStore
+    """
+
+    def init_app(self, app):
+        path = app.config.get('SHARED_CACHE_PATH')
+        app.extensions['shared_cache'] = SharedStore(
+            path, app.config['SHARED_CACHE_INTERVAL']
+        ) if path else None
+
+    @property
+    def store(self):
+        return current_app.extensions.get('shared_cache')
@@ -0,0 +1,14 @@
+import hashlib
+import json
+
+
+def block_hash(content_type, payload, uri, css):
+    """
+    fingerprints the content of a blog post block, so a save can tell which
+    blocks changed without comparing every field. order is left out, as
+    blocks move whenever one is added above them
+    returns
+        40 character hex string
+    """
+    fields = [content_type, payload or '', uri, css]
+    return hashlib.sha1(json.dumps(fields).encode()).hexdigest()
@@ -0,0 +1,151 @@
+"""
+A compact form of the visual thesaurus graph. Where Node.to_dict repeats the
+root, synonym and antonym nodes and every neighbour's label for each term,
+this sends each string once and refers to it by its index:
+
+    {
+        'strings': [...],
+        'terms': {'title': [...], 'definition': [...], 'example': [...],
+                  'layout': [...]},
+        'links': {'source': [...], 'target': [...], 'kind': [...]},
+        'layouts': [[x0, y0, x1, y1, ...], ...],
+        'strength': [link_1_strength, link_2_strength],
+    }
+
+terms are in display order (so a term's index is its order), title,
+definition, example and links.target index strings, links.source indexes
+terms, kind is 0 for a synonym and 1 for an antonym, and terms.layout picks
+the node_to_json positions for the term's shape out of layouts.
+
+encode_binary packs the same columns little endian, 4 byte aligned:
+    b'VTG1'
+    uint32 strings, terms, links, layouts, coordinates (counts)
+    float32 link_1_strength, link_2_strength
+    uint32[terms] title, definition, example, layout
+    uint32[links] source, target
+    uint32[layouts] number of coordinates in each layout
+    float32[coordinates] every layout, one after the other
+    uint32[strings] utf-8 length of each string
+    uint8[links] kind
+    utf-8 bytes of every string, one after the other
+"""
+import numpy as np
+
+from .layout import star_layouts
+
+MAGIC = b'VTG1'
+
+
+def to_columnar(nodes, link_1_strength=0.7, link_2_strength=0.1):
+    """
+    params
+        nodes: iterable of GraphNodes (or Nodes) in display order
+        link_1_strength: float, as passed to node_to_json
+        link_2_strength: float, as passed to node_to_json
+    returns
+        dict, see above
+    """
+    strings = {}
+
+    def intern(s):
+        return strings.setdefault(s or '', len(strings))
+
+    terms = {'title': [], 'definition': [], 'example': [], 'layout': []}
+    links = {'source': [], 'target': [], 'kind': []}
+    shapes = {}
+    for i, node in enumerate(nodes):
+        terms['title'].append(intern(node.title))
+        terms['definition'].append(intern(node.definition))
+        terms['example'].append(intern(node.example))
+        for kind, targets in enumerate((node.synonyms, node.antonyms)):
+            for t in targets:
+                links['source'].append(i)
+                links['target'].append(intern(t))
+                links['kind'].append(kind)
+        shape = (
+            len(node.synonyms), len(node.antonyms), link_1_strength,
+            link_2_strength if node.synonyms or node.antonyms else 0
+        )
+        terms['layout'].append(shapes.setdefault(shape, len(shapes)))
+
+    layouts = star_layouts(shapes)
+    return {
+        'strings': list(strings),
+        'terms': terms,
+        'links': links,
+        'layouts': [
+            [c for xy in layouts[shape] for c in xy] for shape in shapes
+        ],
+        'strength': [link_1_strength, link_2_strength],
+    }
+
+
+def encode_binary(data):
+    """packs the dict from to_columnar into bytes, see above"""
+    encoded = [s.encode() for s in data['strings']]
+    terms, links, layouts = data['terms'], data['links'], data['layouts']
+    coordinates = [c for layout in layouts for c in layout]
+
+    def u32(values):
+        return np.asarray(values, dtype='<u4').tobytes()
+
+    def f32(values):
+        return np.asarray(values, dtype='<f4').tobytes()
+
+    return b''.join([
+        MAGIC,
+        u32([len(encoded), len(terms['title']), len(links['source']),
+             len(layouts), len(coordinates)]),
+        f32(data['strength']),
+        *(u32(terms[column]) for column in ('title', 'definition', 'example', 'layout')),
+        u32(links['source']),
+        u32(links['target']),
+        u32([len(layout) for layout in layouts]),
+        f32(coordinates),
+        u32([len(s) for s in encoded]),
+        np.asarray(links['kind'], dtype='u1').tobytes(),
+        *encoded,
+    ])
+
+
+def decode_binary(body):
+    """unpacks bytes from encode_binary into the dict to_columnar returns"""
+    if body[:4] != MAGIC:
+        raise ValueError('not a columnar thesaurus graph')
+    offset = 4
+
+    def take(dtype, count):
+        nonlocal offset
+        values = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += values.nbytes
+        return values.tolist()
+
+    n_strings, n_terms, n_links, n_layouts, n_coordinates = take('<u4', 5)
+    strength = take('<f4', 2)
+    terms = {
+        column: take('<u4', n_terms)
+        for column in ('title', 'definition', 'example', 'layout')
+    }
+    source, target = take('<u4', n_links), take('<u4', n_links)
+    sizes = take('<u4', n_layouts)
+    coordinates = take('<f4', n_coordinates)
+    lengths = take('<u4', n_strings)
+    kind = take('u1', n_links)
+
+    strings = []
+    for length in lengths:
+        strings.append(body[offset:offset + length].decode())
+        offset += length
+    layouts = []
+    start = 0
+    for size in sizes:
+        layouts.append(coordinates[start:start + size])
+        start += size
+
+    return {
+        'strings': strings,
+        'terms': terms,
+        'links': {'source': source, 'target': target, 'kind': kind},
+        'layouts': layouts,
+        'strength': strength,
+    }
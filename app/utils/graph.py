@@ -0,0 +1,198 @@
+from collections import namedtuple
+from functools import cached_property
+
+# just enough of a Node for node_to_json
+GraphNode = namedtuple(
+    typename='GraphNode',
+    field_names=['id', 'title', 'definition', 'example', 'order', 'synonyms', 'antonyms']
+)
+
+
+class ThesaurusGraph:
+    """
+    An in-memory index of the published thesaurus, keyed by title.
+    params
+        nodes: iterable of (id, title, definition, example), in display order
+        links: iterable of (source_id, kind, target), in position order
+    attributes
+        nodes: dict of title -> GraphNode
+        adjacency: dict of title -> tuple of linked titles that have a node
+        reverse: dict of title -> tuple of titles linking to it
+    """
+
+    def __init__(self, nodes, links):
+        titles = {}
+        records = []
+        for i, (id, title, definition, example) in enumerate(nodes):
+            titles[id] = title
+            records.append((id, title, definition, example, i))
+
+        linked = {id: ([], []) for id in titles}
+        for source_id, kind, target in links:
+            if source_id in linked:
+                linked[source_id][kind == 'antonym'].append(target)
+
+        # a later duplicate title wins, the same as Node.to_dict
+        self.nodes = {}
+        for id, title, definition, example, order in records:
+            synonyms, antonyms = linked[id]
+            self.nodes[title] = GraphNode(
+                id, title, definition, example, order, synonyms, antonyms
+            )
+
+        self.adjacency = {
+            title: tuple(dict.fromkeys(
+                t for t in node.synonyms + node.antonyms if t in self.nodes
+            ))
+            for title, node in self.nodes.items()
+        }
+        reverse = {title: [] for title in self.nodes}
+        for title, targets in self.adjacency.items():
+            for t in targets:
+                reverse[t].append(title)
+        self.reverse = {title: tuple(sources) for title, sources in reverse.items()}
+
+    def __contains__(self, title):
+        return title in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def neighbourhood(self, title, depth=1):
+        """
+        finds every node within depth links of title
+        params
+            title: string
+            depth: int, 0 for just the node itself
+        returns
+            list of GraphNodes in breadth first order, starting at title
+        """
+        seen = {title}
+        found = [self.nodes[title]]
+        frontier = [title]
+        for _ in range(depth):
+            next_frontier = []
+            for current in frontier:
+                for t in self.adjacency[current]:
+                    if t not in seen:
+                        seen.add(t)
+                        found.append(self.nodes[t])
+                        next_frontier.append(t)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return found
+
+    def shortest_path(self, start, end):
+        """
+        finds a shortest chain of links from start to end, searching forwards
+        from start and backwards from end until the two searches meet
+        params
+            start: string
+            end: string
+        returns
+            list of titles from start to end, or None if end can't be reached
+        """
+        if start not in self.nodes or end not in self.nodes:
+            return None
+        if start == end:
+            return [start]
+        # title -> (the title it was reached from, links from the search's start)
+        forward = {start: (None, 0)}
+        backward = {end: (None, 0)}
+        forward_frontier = [start]
+        backward_frontier = [end]
+        while forward_frontier and backward_frontier:
+            # grow whichever side has less to look at
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self._expand(
+                    forward_frontier, self.adjacency, forward, backward
+                )
+            else:
+                backward_frontier, meet = self._expand(
+                    backward_frontier, self.reverse, backward, forward
+                )
+            if meet is not None:
+                path = []
+                t = meet
+                while t is not None:
+                    path.append(t)
+                    t = forward[t][0]
+                path.reverse()
+                t = backward[meet][0]
+                while t is not None:
+                    path.append(t)
+                    t = backward[t][0]
+                return path
+        return None
+
+    @staticmethod
+    def _expand(frontier, edges, parents, other):
+        """
+        takes one whole breadth first step, returns (next frontier, meeting
+        title). The step is finished before choosing where the searches meet,
+        since the first meeting found is not always the closest to the other end
+        """
+        next_frontier = []
+        meet = None
+        for current in frontier:
+            depth = parents[current][1] + 1
+            for t in edges[current]:
+                if t in parents:
+                    continue
+                parents[t] = (current, depth)
+                next_frontier.append(t)
+                if t in other and (meet is None or other[t][1] < other[meet][1]):
+                    meet = t
+        return next_frontier, meet
+
+    def link_kind(self, source, target):
+        """returns 'synonym' or 'antonym' for a link between two titles"""
+        return 'synonym' if target in self.nodes[source].synonyms else 'antonym'
+
+    @cached_property
+    def stats(self):
+        """
+        returns a dict of
+            nodes: int
+            links: int, links between two nodes
+            components: int, groups of nodes connected by links either way
+            largest_component: int, size of the biggest group
+            isolated: list of titles with no links to or from another node
+            unresolved: list of (title, kind, target) where target has no node
+        """
+        component = {}
+        sizes = []
+        for title in self.nodes:
+            if title in component:
+                continue
+            component[title] = len(sizes)
+            stack = [title]
+            size = 0
+            while stack:
+                current = stack.pop()
+                size += 1
+                for t in self.adjacency[current] + self.reverse[current]:
+                    if t not in component:
+                        component[t] = len(sizes)
+                        stack.append(t)
+            sizes.append(size)
+
+        unresolved = []
+        for title, node in self.nodes.items():
+            for kind, targets in (('synonym', node.synonyms), ('antonym', node.antonyms)):
+                unresolved.extend(
+                    (title, kind, t) for t in targets if t not in self.nodes
+                )
+
+        return {
+            'nodes': len(self.nodes),
+            'links': sum(len(targets) for targets in self.adjacency.values()),
+            'components': len(sizes),
+            'largest_component': max(sizes, default=0),
+            'isolated': [
+                title for title in self.nodes
+                if not self.adjacency[title] and not self.reverse[title]
+            ],
+            'unresolved': unresolved,
+        }
@@ -0,0 +1,132 @@
+import numpy as np
+
+# the forces the visual thesaurus page sets up for d3
+CHARGE = -500
+LINK_DISTANCE = 1
+RADIUS = 45
+TICKS = 300
+
+
+def force_layout(n, sources, targets, strengths, ticks=TICKS):
+    """
+    runs d3-force's link, many body, centre and collision forces over a batch
+    of graphs with n nodes each, with every pair of nodes in every graph
+    handled at once rather than one by one
+    params
+        n: int, nodes per graph
+        sources, targets: (graphs, links) int arrays of node indexes
+        strengths: (graphs, links) float array
+        ticks: int
+    returns
+        (graphs, n, 2) array of positions around (0, 0)
+    """
+    sources = np.asarray(sources, dtype=int)
+    targets = np.asarray(targets, dtype=int)
+    graphs = len(sources)
+    # number the nodes of the whole batch, so links can index a flat array
+    offsets = (np.arange(graphs) * n)[:, None]
+    sources = (sources + offsets).ravel()
+    targets = (targets + offsets).ravel()
+    strengths = np.asarray(strengths, dtype=float).reshape(-1, 1)
+
+    # d3's starting spiral, so the result is the same every time
+    i = np.arange(n)
+    r = 10 * np.sqrt(0.5 + i)
+    angle = i * np.pi * (3 - np.sqrt(5))
+    spiral = np.stack([r * np.cos(angle), r * np.sin(angle)], axis=1)
+    pos = np.repeat(spiral[None], graphs, axis=0)
+    vel = np.zeros_like(pos)
+    flat_pos = pos.reshape(-1, 2)
+    flat_vel = vel.reshape(-1, 2)
+
+    count = np.bincount(np.concatenate([sources, targets]), minlength=graphs * n)
+    bias = (count[sources] / (count[sources] + count[targets]))[:, None]
+    alpha = 1.0
+    alpha_decay = 1 - 0.001 ** (1 / ticks)
+    no_self = ~np.eye(n, dtype=bool)
+
+    for _ in range(ticks):
+        alpha -= alpha * alpha_decay
+
+        # links pull towards LINK_DISTANCE, moving the less linked end more
+        d = flat_pos[targets] + flat_vel[targets] - flat_pos[sources] - flat_vel[sources]
+        length = np.maximum(np.hypot(d[:, 0], d[:, 1]), 1e-6)[:, None]
+        pull = d * (length - LINK_DISTANCE) / length * alpha * strengths
+        np.add.at(flat_vel, targets, -pull * bias)
+        np.add.at(flat_vel, sources, pull * (1 - bias))
+
+        # every node pushes every other away
+        diff = pos[:, None, :, :] - pos[:, :, None, :]
+        dist2 = np.maximum((diff ** 2).sum(axis=-1), 1)
+        vel += (diff * (no_self * CHARGE * alpha / dist2)[..., None]).sum(axis=2)
+
+        pos -= pos.mean(axis=1, keepdims=True)
+
+        # overlapping circles are pushed apart, half each
+        ahead = pos + vel
+        diff = ahead[:, :, None, :] - ahead[:, None, :, :]
+        dist = np.maximum(np.sqrt((diff ** 2).sum(axis=-1)), 1e-6)
+        overlap = np.where(no_self & (dist < 2 * RADIUS), (2 * RADIUS - dist) / dist / 2, 0)
+        vel += (diff * overlap[..., None]).sum(axis=2)
+
+        vel *= 0.6
+        pos += vel
+
+    return pos
+
+
+# (synonyms, antonyms, link_1_strength, link_2_strength) -> positions
+_star_layouts = {}
+
+
+def star_layouts(shapes):
+    """
+    lays out the graph node_to_json draws for a term: root, the synonym and
+    antonym hubs, then each synonym and antonym hanging off its hub. As that
+    only depends on how many of each there are, each shape is laid out once
+    and kept. New shapes with the same number of nodes share one batch.
+    params
+        shapes: iterable of (synonyms, antonyms, link_1_strength, link_2_strength)
+    returns
+        dict of shape -> tuple of (x, y) in node_to_json's node order
+    """
+    shapes = set(shapes)
+    by_size = {}
+    for shape in shapes - _star_layouts.keys():
+        by_size.setdefault(shape[0] + shape[1], []).append(shape)
+
+    for leaves, batch in by_size.items():
+        sources = [[1, 2] + list(range(3, 3 + leaves))] * len(batch)
+        targets = [[0, 0] + [1] * s + [2] * a for s, a, _, _ in batch]
+        strengths = [[s1] * 2 + [s2] * leaves for _, _, s1, s2 in batch]
+        positions = force_layout(3 + leaves, sources, targets, strengths)
+        for shape, pos in zip(batch, positions.tolist()):
+            _star_layouts[shape] = tuple((round(x, 1), round(y, 1)) for x, y in pos)
+
+    return {shape: _star_layouts[shape] for shape in shapes}
+
+
+def _shape(term):
+    nodes, links = term['nodes'], term['links']
+    synonyms = sum(1 for n in nodes[3:] if n['group'] == 1)
+    return (
+        synonyms, len(nodes) - 3 - synonyms,
+        links[0]['strength'], links[2]['strength'] if len(links) > 2 else 0
+    )
+
+
+def add_positions(graph):
+    """
+    adds x and y to every node of a {title: node_to_json(...)} dict, in place
+    params
+        graph: dict
+    returns
+        graph
+    """
+    shapes = [_shape(term) for term in graph.values()]
+    layouts = star_layouts(shapes)
+    for term, shape in zip(graph.values(), shapes):
+        for node, (x, y) in zip(term['nodes'], layouts[shape]):
+            node['x'] = x
+            node['y'] = y
+    return graph
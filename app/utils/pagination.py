@@ -0,0 +1,61 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+
+Page = namedtuple(
+    typename='Page',
+    field_names=['items', 'next'],
+    defaults=[None]
+)
+
+
+def encode_cursor(value, id, seen):
+    """
+    packs the sort key of the last row sent, and how many rows have been
+    sent so far, into an opaque url safe string
+    params
+        value: int, string or datetime, the row's sort column
+        id: int, the row's id
+        seen: int
+    returns
+        string
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, id, seen], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse=None):
+    """
+    unpacks a cursor from encode_cursor
+    params
+        cursor: string
+        parse: callable to turn the stored string back into the column's
+            type, e.g. datetime.fromisoformat. Without it the value must be
+            an int, as for the order columns
+    returns
+        (value, id, seen)
+    raises
+        ValueError if the cursor was not made by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, id, seen = json.loads(raw)
+        # checked here, as a value of the wrong type reaches the query as is
+        if parse is None:
+            valid = _is_int(value)
+        else:
+            valid = isinstance(value, str)
+            value = parse(value) if valid else value
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'bad cursor: {cursor!r}') from e
+    if not (valid and _is_int(id) and _is_int(seen)):
+        raise ValueError(f'bad cursor: {cursor!r}')
+    return value, id, seen
+
+
+def _is_int(value):
+    # json true and false come back as bools, which are ints too
+    return isinstance(value, int) and not isinstance(value, bool)
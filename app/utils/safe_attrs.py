@@ -0,0 +1,27 @@
+import re
+from urllib.parse import urlsplit
+
+# schemes a block's uri may use, besides a relative url
+SAFE_SCHEMES = ('http', 'https')
+# css that loads something or runs script, rather than only styling the block
+UNSAFE_CSS = re.compile(r'url\s*\(|expression\s*\(|@import|javascript:|\\', re.IGNORECASE)
+
+
+def safe_uri(uri):
+    """
+    returns uri if it is an http(s) or relative url, otherwise '', so a block
+    can't put a javascript: (or data:, vbscript:...) url into a page.
+    Autoescaping keeps a uri inside its attribute, but not off these
+    """
+    if not uri:
+        return ''
+    # browsers skip whitespace and control characters when reading a scheme
+    scheme = urlsplit(re.sub(r'[\x00-\x20]', '', uri)).scheme.lower()
+    return uri if not scheme or scheme in SAFE_SCHEMES else ''
+
+
+def safe_css(css):
+    """returns css without the declarations UNSAFE_CSS matches"""
+    if not css:
+        return ''
+    return ';'.join(d for d in css.split(';') if not UNSAFE_CSS.search(d))
@@ -0,0 +1,89 @@
+def spread_keys(lo, hi, count, gap):
+    """
+    picks count increasing integer keys strictly between lo and hi
+    params
+        lo: int or None (no lower neighbour)
+        hi: int or None (no upper neighbour)
+        count: int
+        gap: int, spacing used when one side is open
+    returns
+        list of ints, or None if there is no room between lo and hi
+    """
+    if lo is None and hi is None:
+        return [gap * (i + 1) for i in range(count)]
+    if lo is None:
+        return [hi - gap * (count - i) for i in range(count)]
+    if hi is None:
+        return [lo + gap * (i + 1) for i in range(count)]
+    step = (hi - lo) // (count + 1)
+    if step < 1:
+        return None
+    return [lo + step * (i + 1) for i in range(count)]
+
+
+def longest_increasing(values):
+    """
+    finds the longest strictly increasing subsequence of values, skipping Nones
+    params
+        values: list of ints (or None)
+    returns
+        set of indexes into values
+    """
+    # patience sorting: tails[k] is the index ending the best run of length k + 1
+    tails = []
+    prev = [None] * len(values)
+    for i, v in enumerate(values):
+        if v is None:
+            continue
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[tails[mid]] < v:
+                lo = mid + 1
+            else:
+                hi = mid
+        prev[i] = tails[lo - 1] if lo else None
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+
+    result = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        result.add(i)
+        i = prev[i]
+    return result
+
+
+def assign_keys(sequence, keys, gap):
+    """
+    works out the fewest key changes that put sequence into display order
+    params
+        sequence: list of ids in their new order
+        keys: dict of id -> current key
+        gap: int, spacing between keys
+    returns
+        dict of id -> new key, containing only the ids whose key changes
+    """
+    anchors = longest_increasing([keys[id] for id in sequence])
+    new_keys = {}
+    run = []
+    lo = None
+    for i, id in enumerate(sequence + [None]):
+        if id is not None and i not in anchors:
+            run.append(id)
+            continue
+        hi = keys[id] if id is not None else None
+        if run:
+            spread = spread_keys(lo, hi, len(run), gap)
+            if spread is None:
+                # neighbours are packed too tightly, so respace the whole list
+                return {
+                    id: gap * (i + 1) for i, id in enumerate(sequence)
+                    if keys[id] != gap * (i + 1)
+                }
+            new_keys.update(zip(run, spread))
+            run = []
+        lo = hi
+    return new_keys
@@ -0,0 +1,92 @@
+import numpy as np
+from scipy import sparse
+
+from .term_index import normalize
+
+
+class SuggestionIndex:
+    """
+    Scores candidate synonyms and antonyms for every node at once, by
+    counting the two link paths between terms across the whole thesaurus.
+    params
+        nodes: iterable of (id, title)
+        links: iterable of (source_id, kind, target)
+    Terms are matched by normalized title, and words that are only ever link
+    targets take part too. With S and A the (symmetric) synonym and antonym
+    adjacency matrices:
+        synonym score = S @ S + A @ A, a synonym of a synonym, or an
+                        antonym of an antonym
+        antonym score = S @ A + A @ S, a synonym of an antonym or vice versa
+    """
+
+    def __init__(self, nodes, links):
+        rows = {}
+        self.labels = []
+        self._row_of = {}
+
+        def row(title):
+            key = normalize(title)
+            if not key:
+                return None
+            if key not in rows:
+                rows[key] = len(self.labels)
+                self.labels.append(title)
+            return rows[key]
+
+        # node titles come first, so they win over other spellings of a term
+        for id, title in nodes:
+            i = row(title)
+            if i is not None:
+                self._row_of[id] = i
+
+        pairs = {'synonym': ([], []), 'antonym': ([], [])}
+        for source_id, kind, target in links:
+            i = self._row_of.get(source_id)
+            j = row(target)
+            if i is not None and j is not None and i != j:
+                pairs[kind][0].append(i)
+                pairs[kind][1].append(j)
+
+        n = len(self.labels)
+        S = self._adjacency(*pairs['synonym'], n)
+        A = self._adjacency(*pairs['antonym'], n)
+        self.linked = (S + A).tocsr()
+        self.synonym_scores = (S @ S + A @ A).tocsr()
+        self.antonym_scores = (S @ A + A @ S).tocsr()
+
+    @staticmethod
+    def _adjacency(sources, targets, n):
+        """returns a 0/1 matrix linking each pair both ways"""
+        m = sparse.coo_matrix(
+            (np.ones(len(sources), dtype=np.int32), (sources, targets)), shape=(n, n)
+        ).tocsr()
+        m = (m + m.T).tocsr()
+        m.data[:] = 1
+        return m
+
+    def __contains__(self, id):
+        return id in self._row_of
+
+    def suggest(self, id, limit=10):
+        """
+        returns the best unlinked candidates for node id as
+        {'synonyms': [(term, score)], 'antonyms': [(term, score)]}
+        """
+        i = self._row_of.get(id)
+        if i is None:
+            return {'synonyms': [], 'antonyms': []}
+        linked = self.linked.indices[self.linked.indptr[i]:self.linked.indptr[i + 1]]
+        return {
+            'synonyms': self._top(self.synonym_scores, i, linked, limit),
+            'antonyms': self._top(self.antonym_scores, i, linked, limit),
+        }
+
+    def _top(self, scores, i, linked, limit):
+        start, end = scores.indptr[i], scores.indptr[i + 1]
+        columns = scores.indices[start:end]
+        values = scores.data[start:end]
+        keep = (columns != i) & ~np.isin(columns, linked)
+        columns, values = columns[keep], values[keep]
+        # highest score first, ties in the order terms were first seen
+        best = np.lexsort((columns, -values))[:limit]
+        return [(self.labels[columns[b]], int(values[b])) for b in best]
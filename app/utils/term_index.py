@@ -0,0 +1,158 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+
+def normalize(term):
+    """folds case and whitespace, so 'Happy ' and ' happy' are the same term"""
+    return ' '.join(term.split()).casefold() if term else ''
+
+
+def trigrams(key):
+    """
+    returns the set of 3 letter slices of key, padded so ends count too. Only
+    one space goes in front, as a '  h' slice would file the key with every
+    other word starting with h, and make each search wade through them
+    """
+    padded = f' {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TermIndex:
+    """
+    Searchable index of thesaurus titles, by normalized key.
+    params
+        entries: iterable of (id, title, published)
+    Keys are kept in a sorted list for prefix lookups, and every key is
+    filed under its trigrams for typo tolerant lookups. add and remove keep
+    both up to date, so the index can follow edits without a rebuild.
+    """
+
+    def __init__(self, entries=()):
+        self._keys = []
+        # key -> {id: (title, published)}
+        self._terms = defaultdict(dict)
+        self._key_of = {}
+        self._grams = defaultdict(set)
+        # key -> number of trigrams in it
+        self._sizes = {}
+        for id, title, published in entries:
+            key = normalize(title)
+            if key:
+                self._terms[key][id] = (title, published)
+                self._key_of[id] = key
+        self._keys = sorted(self._terms)
+        for key in self._keys:
+            self._file(key)
+
+    def __len__(self):
+        return len(self._key_of)
+
+    def copy(self):
+        """returns an index with the same entries, without normalizing them again"""
+        other = TermIndex()
+        other._keys = list(self._keys)
+        other._terms.update((key, dict(terms)) for key, terms in self._terms.items())
+        other._key_of = dict(self._key_of)
+        other._grams.update((gram, set(keys)) for gram, keys in self._grams.items())
+        other._sizes = dict(self._sizes)
+        return other
+
+    def add(self, id, title, published):
+        """adds or updates the entry for id"""
+        self.remove(id)
+        key = normalize(title)
+        if not key:
+            return
+        if key not in self._terms:
+            insort(self._keys, key)
+            self._file(key)
+        self._terms[key][id] = (title, published)
+        self._key_of[id] = key
+
+    def remove(self, id):
+        """removes the entry for id, if there is one"""
+        key = self._key_of.pop(id, None)
+        if key is None:
+            return
+        terms = self._terms[key]
+        del terms[id]
+        if terms:
+            return
+        del self._terms[key]
+        del self._keys[bisect_left(self._keys, key)]
+        del self._sizes[key]
+        for gram in trigrams(key):
+            self._grams[gram].discard(key)
+            if not self._grams[gram]:
+                del self._grams[gram]
+
+    def _file(self, key):
+        grams = trigrams(key)
+        self._sizes[key] = len(grams)
+        for gram in grams:
+            self._grams[gram].add(key)
+
+    def _matches(self, key, published_only):
+        return [
+            (id, title) for id, (title, published) in self._terms[key].items()
+            if published or not published_only
+        ]
+
+    def prefix(self, q, limit=10, published_only=True):
+        """
+        returns up to limit (id, title) pairs whose key starts with q,
+        in alphabetical order
+        """
+        q = normalize(q)
+        results = []
+        if not q:
+            return results
+        i = bisect_left(self._keys, q)
+        while i < len(self._keys) and len(results) < limit:
+            key = self._keys[i]
+            if not key.startswith(q):
+                break
+            results.extend(self._matches(key, published_only))
+            i += 1
+        return results[:limit]
+
+    def fuzzy(self, q, limit=10, published_only=True, threshold=0.3):
+        """
+        returns up to limit (id, title) pairs whose key shares enough
+        trigrams with q, most similar first
+        """
+        q = normalize(q)
+        if not q:
+            return []
+        grams = trigrams(q)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        # dice coefficient of the two trigram sets
+        sizes = self._sizes
+        size = len(grams)
+        scored = [
+            (-score, key) for score, key in (
+                (2 * count / (size + sizes[key]), key) for key, count in shared.items()
+            )
+            if score >= threshold
+        ]
+        scored.sort()
+
+        results = []
+        for _, key in scored:
+            if len(results) >= limit:
+                break
+            results.extend(self._matches(key, published_only))
+        return results[:limit]
+
+    def search(self, q, limit=10, published_only=True):
+        """returns prefix matches, topped up with fuzzy matches"""
+        results = self.prefix(q, limit, published_only)
+        if len(results) < limit:
+            seen = {id for id, _ in results}
+            results.extend(
+                r for r in self.fuzzy(q, limit, published_only)
+                if r[0] not in seen
+            )
+        return results[:limit]
@@ -1,10 +1,11 @@
-def node_to_json(data, link_1_strength=0.7, link_2_strength=0.1):
+def node_to_json(data, link_1_strength=0.7, link_2_strength=0.1, order=None):
     """
     transforms sqlalchemy Node object into json
     params
         data: Node instance
         link_1_strength: float
         link_2_strength: float
+        order: int, overrides data.order (e.g. with a display position)
     returns
         dict
     """
@@ -13,7 +14,7 @@ def node_to_json(data, link_1_strength=0.7, link_2_strength=0.1):
     result['title'] = data.title
     result['example'] = data.example
     result['definition'] = data.definition
-    result['order'] = data.order
+    result['order'] = data.order if order is None else order
     
     for s in data.synonyms:
         result['links'].append(add_link('synonym', s, link_2_strength))
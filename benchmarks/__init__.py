@@ -0,0 +1,5 @@
+"""
+Standalone timing scripts, run from the project root, e.g.
+    python -m benchmarks.bench_ordering
+They build the app with the testing config, so nothing touches the dev db.
+"""
@@ -0,0 +1,65 @@
+"""
+Times laying out the visual thesaurus at 1k, 10k and 100k terms, with the
+peak memory the layout allocates. Cold runs lay out every distinct shape of
+term (number of synonyms and antonyms) from scratch, warm runs find them all
+already laid out, as happens when the graph is rebuilt after an edit.
+"""
+import random
+import time
+import tracemalloc
+
+from app.utils.graph import GraphNode
+from app.utils import layout
+from app.utils.layout import add_positions, force_layout
+from app.utils.to_json import node_to_json
+
+SIZES = (1000, 10000, 100000)
+
+
+def make_graph(terms, rng):
+    return {
+        f'word{i}': node_to_json(GraphNode(
+            i, f'word{i}', '', '', i,
+            [f's{j}' for j in range(rng.randint(0, 12))],
+            [f'a{j}' for j in range(rng.randint(0, 6))],
+        ))
+        for i in range(terms)
+    }
+
+
+def measure(label, func, reset):
+    """times func, then runs it again under tracemalloc for its peak memory"""
+    reset()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    reset()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<45} {elapsed * 1000:>10.1f} ms {peak / 2 ** 20:>8.1f} MiB peak')
+
+
+def main():
+    rng = random.Random(0)
+    # what laying out every term separately would cost, from a sample
+    n = 3 + 6 + 3
+    start = time.perf_counter()
+    for _ in range(20):
+        force_layout(
+            n, [[1, 2] + list(range(3, n))], [[0, 0] + [1] * 6 + [2] * 3], [[0.7] * 2 + [0.1] * 9]
+        )
+    per_term = (time.perf_counter() - start) / 20
+    for size in SIZES:
+        print(f'{f"one layout per term, {size} terms (projected)":<45} {per_term * size * 1000:>10.1f} ms')
+
+    for size in SIZES:
+        graph = make_graph(size, rng)
+        measure(f'{size} terms, cold', lambda: add_positions(graph), layout._star_layouts.clear)
+        print(f'{"":<45} {len(layout._star_layouts):>10} shapes')
+        measure(f'{size} terms, warm', lambda: add_positions(graph), lambda: None)
+
+
+if __name__ == '__main__':
+    main()
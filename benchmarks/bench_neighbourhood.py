@@ -0,0 +1,69 @@
+"""
+Times the visual thesaurus payload on a synthetic 100k node graph: the full
+Node.to_dict graph that /api/vt-data serializes, against the k-hop
+neighbourhoods served by /api/vt-data/<title>, plus the word ladder
+(/api/vt-path) and graph stats queries over the same index. Every node links to a few
+nearby titles plus one random far away one, so neighbourhoods grow with depth
+the way a real vocabulary does.
+"""
+import json
+import random
+
+from app import db
+from app.models import Node, NodeLink, graph_index
+
+from .common import make_app, timed
+
+NODES = 100000
+ROUNDS = 20
+
+
+def seed(nodes):
+    rng = random.Random(0)
+    db.session.execute(Node.__table__.insert(), [
+        {'title': f'word{i}', 'definition': f'definition {i}', 'example': f'example {i}',
+         'published': True, 'order': i}
+        for i in range(nodes)
+    ])
+    db.session.execute(NodeLink.__table__.insert(), [
+        {'source_id': i + 1, 'target': f'word{target % nodes}', 'kind': kind, 'position': p}
+        for i in range(nodes)
+        for p, (kind, target) in enumerate((
+            ('synonym', i + 1), ('synonym', i + 2),
+            ('antonym', i + 7), ('synonym', rng.randrange(nodes)),
+        ))
+    ])
+    db.session.commit()
+
+
+def main():
+    make_app()
+    seed(NODES)
+
+    with timed('Node.to_dict (full graph)'):
+        size = len(json.dumps(Node.to_dict()))
+    print(f'{"":<45} {size / 1024:>10.0f} KiB')
+
+    with timed('build adjacency index'):
+        graph_index.get()
+
+    titles = [f'word{i}' for i in random.Random(1).sample(range(NODES), ROUNDS)]
+    for depth in range(4):
+        sizes = []
+        with timed(f'neighbourhood depth={depth}', ROUNDS):
+            for title in titles:
+                sizes.append(len(json.dumps(Node.get_neighbourhood(title, depth))))
+        print(f'{"":<45} {sum(sizes) / ROUNDS / 1024:>10.1f} KiB')
+
+    lengths = []
+    with timed('shortest path', ROUNDS):
+        for start, end in zip(titles, reversed(titles)):
+            lengths.append(len(Node.get_path(start, end) or ()))
+    print(f'{"":<45} {sum(lengths) / ROUNDS:>10.1f} steps')
+
+    with timed('graph stats'):
+        Node.get_graph_stats()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Times inserting and deleting a single entry in the middle of a 50k row table,
+comparing the APIMixin helpers against loading every row into the session and
+renumbering it in python. The packed run starts from dense orders (every
+insert has to push the later rows back), the sparse run from ORDER_GAP spacing.
+"""
+from app import db
+from app.models import Quote
+
+from .common import make_app, timed
+
+ROWS = 50000
+ROUNDS = 5
+
+
+def seed(rows, gap=1):
+    db.session.execute(Quote.__table__.delete())
+    db.session.execute(
+        Quote.__table__.insert(),
+        [
+            {'author': f'author {i}', 'text': f'text {i}', 'published': True, 'order': i * gap}
+            for i in range(rows)
+        ]
+    )
+    db.session.commit()
+
+
+def naive_new_by_order(order):
+    current = Quote.query.all()
+    for entry in current:
+        if entry.order >= order:
+            entry.order += 1
+    db.session.add_all([*current, Quote(order=order)])
+    db.session.commit()
+
+
+def naive_delete(id):
+    to_del = Quote.query.filter_by(id=id).first_or_404()
+    entries = [r for r in Quote.query.all() if r.order > to_del.order]
+    for r in entries:
+        r.order -= 1
+    db.session.delete(to_del)
+    db.session.commit()
+
+
+def main():
+    make_app()
+    middle = ROWS // 2
+
+    seed(ROWS)
+    with timed('load-all new_by_order', ROUNDS):
+        for _ in range(ROUNDS):
+            naive_new_by_order(middle)
+    with timed('load-all delete', ROUNDS):
+        for _ in range(ROUNDS):
+            naive_delete(Quote.query.filter_by(order=middle).first().id)
+
+    for label, gap in (('packed', 1), ('sparse', Quote.ORDER_GAP)):
+        seed(ROWS, gap)
+        with timed(f'{label} new_by_order', ROUNDS):
+            for _ in range(ROUNDS):
+                Quote.new_by_order(middle)
+        with timed(f'{label} delete', ROUNDS):
+            for _ in range(ROUNDS):
+                Quote.delete(Quote.ordered().offset(middle).first().id)
+        with timed(f'{label} new (append)', ROUNDS):
+            for _ in range(ROUNDS):
+                Quote.new()
+
+        keys = [q.order for q in Quote.ordered().all()]
+        assert len(set(keys)) == len(keys), 'duplicate sort keys'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Times the public pages with the page cache off, in memory and in a SQLite
+file, over a site with 200 blog posts of 50 blocks, 500 quotes, videos,
+resources and a 2k term thesaurus. Cached rounds follow one warm up request
+per url, so they show the steady state between editor saves.
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from app import db, page_cache
+from app.models import Node, NodeLink, Post, PostContents, Quote, Resource, User, Video
+
+from .common import make_app, timed
+
+POSTS = 200
+BLOCKS = 50
+ROUNDS = 200
+URLS = [
+    '/', '/blog', '/blog-0', '/blog-100', '/resources', '/videos',
+    '/alt-thesaurus-10', '/api/qt-data',
+]
+
+
+def seed():
+    user = User(email='a@b.c', username='author', first_name='Jo', last_name='Writer')
+    db.session.add(user)
+    db.session.flush()
+    start = datetime(2021, 1, 1)
+    for i in range(POSTS):
+        post = Post(
+            title=f'post {i}', author_id=user.id, published=True,
+            date_created=start + timedelta(days=i), order=i
+        )
+        db.session.add(post)
+        db.session.flush()
+        contents = [
+            {'id': None, 'post_id': post.id, 'order': j, 'content_type': 'p',
+             'payload': f'paragraph {j} of post {i} ' * 20, 'uri': None, 'css': None}
+            for j in range(BLOCKS)
+        ]
+        contents = PostContents.update_contents(post.id, contents)
+        post.refresh_listing(contents)
+        post.refresh_body(contents)
+    db.session.execute(Quote.__table__.insert(), [
+        {'text': f'quote {i}', 'author': 'someone', 'published': True, 'order': i}
+        for i in range(500)
+    ])
+    db.session.execute(Video.__table__.insert(), [
+        {'title': f'video {i}', 'url': 'https://example.com', 'published': True, 'order': i}
+        for i in range(50)
+    ])
+    db.session.execute(Resource.__table__.insert(), [
+        {'title': f'resource {i}', 'text': 'about it', 'published': True, 'order': i}
+        for i in range(50)
+    ])
+    db.session.execute(Node.__table__.insert(), [
+        {'title': f'word{i}', 'definition': f'definition {i}', 'published': True, 'order': i}
+        for i in range(2000)
+    ])
+    db.session.execute(NodeLink.__table__.insert(), [
+        {'source_id': i + 1, 'target': f'word{(i + k) % 2000}', 'kind': 'synonym', 'position': k}
+        for i in range(2000) for k in range(1, 5)
+    ])
+    db.session.commit()
+
+
+def run(app, label):
+    client = app.test_client()
+    for url in URLS:
+        client.get(url)
+    with timed(label, ROUNDS * len(URLS)):
+        for _ in range(ROUNDS):
+            for url in URLS:
+                client.get(url)
+
+
+def main():
+    app = make_app()
+    seed()
+    client = app.test_client()
+    for url in URLS:
+        with timed(f'uncached {url}', ROUNDS):
+            for _ in range(ROUNDS):
+                client.get(url)
+
+    run(app, 'every url, no cache')
+
+    app.config['PAGE_CACHE_TYPE'] = 'lru'
+    page_cache.init_app(app)
+    run(app, 'every url, in memory cache')
+    print(f'{"":<45} {page_cache.stats()}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config['PAGE_CACHE_TYPE'] = 'sqlite'
+        app.config['PAGE_CACHE_PATH'] = os.path.join(tmp, 'pages.sqlite')
+        page_cache.init_app(app)
+        run(app, 'every url, sqlite cache')
+        print(f'{"":<45} {page_cache.stats()}')
+
+    # a save invalidates the pages that read posts, and only those
+    app.config['PAGE_CACHE_TYPE'] = 'lru'
+    page_cache.init_app(app)
+    run(app, 'every url, in memory cache')
+    post = Post.query.get(1)
+    with timed('save a post, then every url once', len(URLS)):
+        post.title = 'edited'
+        db.session.commit()
+        client = app.test_client()
+        for url in URLS:
+            client.get(url)
+    print(f'{"":<45} {page_cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
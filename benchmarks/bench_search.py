@@ -0,0 +1,59 @@
+"""
+Times thesaurus term search on 100k made up words: building the index,
+prefix and fuzzy lookups, and patching the index after an edit compared
+with rebuilding it.
+"""
+import random
+import string
+
+from app import db
+from app.models import Node, term_index
+
+from .common import make_app, timed
+
+NODES = 100000
+ROUNDS = 200
+
+
+def seed(nodes):
+    rng = random.Random(0)
+    db.session.execute(Node.__table__.insert(), [
+        {
+            'title': ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12))),
+            'published': True, 'order': i
+        }
+        for i in range(nodes)
+    ])
+    db.session.commit()
+
+
+def main():
+    make_app()
+    seed(NODES)
+    with timed('build index'):
+        term_index.get()
+
+    rng = random.Random(1)
+    titles = [t for t, in Node.query.with_entities(Node.title).limit(ROUNDS)]
+    with timed('prefix (3 letters)', ROUNDS):
+        for title in titles:
+            Node.search(title[:3])
+    with timed('search with a typo', ROUNDS):
+        for title in titles:
+            i = rng.randrange(len(title))
+            Node.search(title[:i] + title[i + 1:] + 'x')
+
+    node = Node.query.get(1)
+    with timed('edit a title, patch the index'):
+        node.title = 'patched'
+        db.session.commit()
+        Node.search('patched')
+    with timed('edit a title, rebuild the index'):
+        node.title = 'rebuilt'
+        db.session.commit()
+        term_index.clear()
+        Node.search('rebuilt')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares per process caching of the /api/vt-data json snapshot for a 3k term
+thesaurus with the shared cache, for WORKERS workers on one host. Each
+worker is a SharedStore of its own over the same directory, as a gunicorn
+worker would be. Shows the time for every worker to get the graph after an
+edit, and the bytes each worker keeps on its own heap.
+"""
+import shutil
+import tempfile
+import tracemalloc
+
+from app import db, shared_cache
+from app.models import Node, _build_graph_snapshot
+from app.shared_cache import SharedStore
+
+from .bench_wire import NODES, seed
+from .common import make_app, timed
+
+WORKERS = 8
+
+
+def build():
+    etag, body = _build_graph_snapshot('json')
+    return {'etag': etag}, body
+
+
+def held(fetch):
+    """returns the bytes still allocated once fetch() has run and returned"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = fetch()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    app = make_app()
+    seed(NODES)
+    path = tempfile.mkdtemp()
+    try:
+        app.config['SHARED_CACHE_PATH'] = path
+        shared_cache.init_app(app)
+        workers = [SharedStore(path) for _ in range(WORKERS)]
+
+        node = Node.query.first()
+        node.definition = 'edited'
+        db.session.commit()
+        with timed(f'edit, then {WORKERS} per process builds'):
+            for _ in workers:
+                build()
+        node.definition = 'edited again'
+        db.session.commit()
+        with timed(f'edit, then {WORKERS} shared fetches'):
+            for worker in workers:
+                worker.fetch('graph:json', build, Node)
+        print(f'{"":<45} {sum(w.misses for w in workers):>10} builds')
+
+        with timed(f'warm shared fetch, {WORKERS} workers', WORKERS):
+            for worker in workers:
+                worker.fetch('graph:json', build, Node)
+
+        own = held(build)
+        shared = held(lambda: workers[0].read('graph:json'))
+        print(f'{"per process heap per worker":<45} {own / 1024:>10.0f} KiB')
+        print(f'{"shared heap per worker":<45} {shared / 1024:>10.0f} KiB')
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
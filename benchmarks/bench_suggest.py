@@ -0,0 +1,67 @@
+"""
+Times synonym suggestions on a synthetic 50k node thesaurus: counting two
+link paths for one node in python over Node.query.all(), against building
+the SuggestionIndex matrices once and reading a row per request.
+"""
+import random
+from collections import Counter
+
+from app import db
+from app.models import Node, NodeLink, suggestion_index
+
+from .common import make_app, timed
+
+NODES = 50000
+ROUNDS = 20
+
+
+def seed(nodes):
+    rng = random.Random(0)
+    db.session.execute(Node.__table__.insert(), [
+        {'title': f'word{i}', 'published': True, 'order': i}
+        for i in range(nodes)
+    ])
+    db.session.execute(NodeLink.__table__.insert(), [
+        {'source_id': i + 1, 'target': f'word{rng.randrange(nodes)}', 'kind': kind, 'position': p}
+        for i in range(nodes)
+        for p, kind in enumerate(('synonym', 'synonym', 'synonym', 'antonym', 'antonym'))
+    ])
+    db.session.commit()
+
+
+def naive_suggest(id, limit=10):
+    nodes = {n.title: n for n in Node.query.all()}
+    node = Node.query.get(id)
+    linked = set(node.synonyms + node.antonyms)
+    synonyms, antonyms = Counter(), Counter()
+    for kind, words in (('synonym', node.synonyms), ('antonym', node.antonyms)):
+        for word in words:
+            other = nodes.get(word)
+            if other is None:
+                continue
+            for s in other.synonyms:
+                (synonyms if kind == 'synonym' else antonyms)[s] += 1
+            for a in other.antonyms:
+                (antonyms if kind == 'synonym' else synonyms)[a] += 1
+    for counter in (synonyms, antonyms):
+        for word in linked | {node.title}:
+            counter.pop(word, None)
+    return synonyms.most_common(limit), antonyms.most_common(limit)
+
+
+def main():
+    make_app()
+    seed(NODES)
+    ids = random.Random(1).sample(range(1, NODES + 1), ROUNDS)
+
+    with timed('python loop, one node'):
+        naive_suggest(ids[0])
+    with timed('build matrices'):
+        suggestion_index.get()
+    with timed('suggest from matrices', ROUNDS):
+        for id in ids:
+            Node.get_suggestions(id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Compares /api/vt-data payload sizes for a 3k term thesaurus (the size where
+the plain json reaches several MB): Node.to_dict as json, the columnar json
+and its binary encoding, each raw and gzipped, with the time to build each
+snapshot from an empty cache.
+"""
+import gzip
+import random
+
+from app import db
+from app.models import Node, NodeLink, graph_snapshots, GRAPH_FORMATS
+
+from .common import make_app, timed
+
+NODES = 3000
+
+
+def seed(nodes):
+    rng = random.Random(0)
+    db.session.execute(Node.__table__.insert(), [
+        {
+            'title': f'word{i}', 'published': True, 'order': i,
+            'definition': f'a made up definition of word {i}, about this long',
+            'example': f'an example sentence using word {i}, also made up',
+        }
+        for i in range(nodes)
+    ])
+    db.session.execute(NodeLink.__table__.insert(), [
+        {'source_id': i + 1, 'target': f'word{rng.randrange(nodes)}', 'kind': kind, 'position': p}
+        for i in range(nodes)
+        for p, kind in enumerate(['synonym'] * rng.randint(2, 10) + ['antonym'] * rng.randint(0, 5))
+    ])
+    db.session.commit()
+
+
+def main():
+    make_app()
+    seed(NODES)
+    Node.get_graph_snapshot('columnar')
+    for format in GRAPH_FORMATS:
+        graph_snapshots[format].clear()
+        with timed(f'build {format} snapshot'):
+            _, body = Node.get_graph_snapshot(format)
+        print(
+            f'{"":<45} {len(body) / 1024:>10.0f} KiB'
+            f' {len(gzip.compress(body)) / 1024:>8.0f} KiB gzipped'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import create_app, db
+
+
+def make_app():
+    """pushes an app context for the testing config and creates the tables"""
+    app = create_app('testing')
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+@contextmanager
+def timed(label, rounds=1):
+    """prints wall time and the number of SQL statements run inside the block"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        event.remove(engine, 'before_cursor_execute', count)
+        print(
+            f'{label:<45} {elapsed / rounds * 1000:>10.2f} ms'
+            f' {len(statements) / rounds:>8.1f} statements'
+        )
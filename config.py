@@ -19,6 +19,24 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False 
     SQLALCHEMY_RECORD_QUERIES = True
     SLOW_DB_QUERY_TIME = 0.5
+    # deepest neighbourhood /api/vt-data/<title> will walk
+    VT_MAX_DEPTH = 3
+    # most rows a ?limit= page can hold
+    MAX_PAGE_SIZE = 500
+    # directory of payloads shared by every worker on the host, see
+    # SharedStore. None keeps every cache in its own process
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH')
+    SHARED_CACHE_INTERVAL = 1
+    # whole responses of public pages, see PageCache. 'lru', 'sqlite',
+    # 'shared' or None. 'lru' and 'sqlite' only see commits made by other
+    # workers once PAGE_CACHE_MAX_AGE has passed, so behind several workers
+    # a page can be that stale; 'shared' pages are within SHARED_CACHE_INTERVAL.
+    # Shared when SHARED_CACHE_PATH is set, otherwise off unless asked for
+    PAGE_CACHE_TYPE = os.environ.get('PAGE_CACHE_TYPE') or \
+        ('shared' if SHARED_CACHE_PATH else None)
+    PAGE_CACHE_SIZE = 256
+    PAGE_CACHE_PATH = os.path.join(basedir, 'page-cache.sqlite')
+    PAGE_CACHE_MAX_AGE = 60
     JWT_ACCESS_LIFESPAN = {"hours": 24}
     JWT_REFRESH_LIFESPAN = {"days": 3}
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT')
@@ -30,6 +48,8 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    # the dev server is a single process, so nothing goes stale
+    PAGE_CACHE_TYPE = Config.PAGE_CACHE_TYPE or 'lru'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'data-dev.sqlite')
 
@@ -38,6 +58,9 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or \
         'sqlite://'     # why does this have one less backslash than dev?
     WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
+    PAGE_CACHE_TYPE = None
+    SHARED_CACHE_PATH = None
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
@@ -1,7 +1,9 @@
 import os
 from flask_migrate import Migrate, upgrade
 from app import create_app, db
-from app.models import User, Post, PostContents, Quote, Node, Video, Resource
+from app.models import (
+    User, Post, PostContents, Quote, Node, NodeLink, Video, Resource, CacheGeneration
+)
 
 from dotenv import load_dotenv
 
@@ -19,8 +21,9 @@ migrate = Migrate(app, db)
 @app.shell_context_processor 
 def make_shell_context():
     return dict(
-        db=db, Node=Node, Post=Post, PostContents=PostContents,
-        User=User, Quote=Quote, Video=Video, Resource=Resource
+        db=db, Node=Node, NodeLink=NodeLink, Post=Post, PostContents=PostContents,
+        User=User, Quote=Quote, Video=Video, Resource=Resource,
+        CacheGeneration=CacheGeneration
     )
 
 @app.cli.command()
@@ -28,4 +31,20 @@ def test():
     """run all unittests"""
     import unittest
     tests = unittest.TestLoader().discover('tests')
-    unittest.TextTestRunner(verbosity=2).run(tests)
\ No newline at end of file
+    unittest.TextTestRunner(verbosity=2).run(tests)
+
+@app.cli.command('rebalance-order')
+def rebalance_order():
+    """respace the sort keys of any list whose gaps have run out"""
+    for Model in (Quote, Post, Node, Video, Resource):
+        count = Model.rebalance_order()
+        print(f'{Model.__tablename__}: rewrote {count} rows')
+
+@app.cli.command('render-posts')
+def render_posts():
+    """render the body of every published post, e.g. after a template change"""
+    posts = Post.query.filter_by(published=True).all()
+    for post in posts:
+        post.refresh_body()
+    db.session.commit()
+    print(f'posts: rendered {len(posts)}')
@@ -0,0 +1,55 @@
+"""sparse order keys
+
+Revision ID: 803c71017fc0
+Revises: 6de521994213
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '803c71017fc0'
+down_revision = '6de521994213'
+branch_labels = None
+depends_on = None
+
+# must match APIMixin.ORDER_GAP
+ORDER_GAP = 1024
+TABLES = ['quotes', 'posts', 'nodes', 'videos', 'resources']
+
+
+def renumber(table_name, step, start):
+    """rewrites order as start, start + step, ... keeping the current display order"""
+    conn = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('order', sa.Integer)
+    )
+    rows = conn.execute(
+        sa.select([table.c.id]).order_by(table.c.order, table.c.id)
+    ).fetchall()
+    if not rows:
+        return
+    conn.execute(
+        table.update()
+            .where(table.c.id == sa.bindparam('_id'))
+            .values(order=sa.bindparam('_order')),
+        [{'_id': r.id, '_order': start + i * step} for i, r in enumerate(rows)]
+    )
+
+
+def upgrade():
+    for table_name in TABLES:
+        renumber(table_name, ORDER_GAP, ORDER_GAP)
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_index(batch_op.f(f'ix_{table_name}_order'), ['order'], unique=False)
+
+
+def downgrade():
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table_name}_order'))
+        renumber(table_name, 1, 0)
@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCountMixin:
+    """adds assertQueryCount to a TestCase"""
+
+    @contextmanager
+    def assertQueryCount(self, expected):
+        """fails unless exactly expected SQL statements run inside the block"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertTrue(
+            len(statements) == expected,
+            f'expected {expected} queries, ran {len(statements)}:\n' + '\n'.join(statements)
+        )
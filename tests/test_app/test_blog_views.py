@@ -0,0 +1,153 @@
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db, guard
+from app.models import User, Post, PostContents
+from app.utils.pagination import encode_cursor
+from .helpers import QueryCountMixin
+
+
+class BlogViewsTestCase(QueryCountMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        user = User(
+            email='myemail@gmail.edu',
+            username='username',
+            first_name='Hieronymus',
+            last_name='Kapsberger',
+            password='never guess this!',
+            roles='admin'
+        )
+        db.session.add(user)
+        db.session.commit()
+        self.token = guard.encode_jwt_token(user)
+
+        start = datetime(2021, 1, 1)
+        for i in range(10):
+            post = Post(
+                title=f'post {i}',
+                author_id=user.id,
+                published=True,
+                date_created=start + timedelta(days=i),
+                order=i
+            )
+            db.session.add(post)
+            db.session.flush()
+            db.session.add_all([
+                PostContents(post_id=post.id, order=j, content_type='p', payload=f'block {j}')
+                for j in reversed(range(5))
+            ])
+            db.session.flush()
+            post.refresh_listing()
+            post.refresh_body()
+        db.session.commit()
+        db.session.expire_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_blog_index(self):
+        # one narrow query over the materialised listing fields
+        with self.assertQueryCount(1):
+            response = self.client.get('/blog')
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(b'post 9' in response.data)
+        self.assertTrue(b'block 0 block 1' in response.data)
+        self.assertTrue(b'Hieronymus Kapsberger' in response.data)
+
+    def test_blog_post(self):
+        # the post with its user and rendered body, then one lookup per neighbour
+        with self.assertQueryCount(3) as statements:
+            response = self.client.get('/blog-5')
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(b'block 0</p>' in response.data and b'block 4</p>' in response.data)
+        self.assertTrue(not any('post_contents' in s for s in statements))
+
+        # a post saved before bodies were stored is rendered from its blocks
+        Post.query.filter_by(id=5).update({Post.body_html: None})
+        db.session.commit()
+        rendered = response.data
+        with self.assertQueryCount(4):
+            response = self.client.get('/blog-5')
+        self.assertTrue(response.data == rendered)
+
+    def test_blog_post_saved(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        contents = self.client.get('/api/blog-5', headers=headers).get_json()['contents']
+        contents[0]['payload'] = '<script>alert(1)</script>'
+        contents[1].update(content_type='img', uri='javascript:alert(1)', css='color: red')
+        data = {
+            'title': 'post 4', 'sub_title': None, 'published': True,
+            'update_timestamp': True, 'contents': contents
+        }
+        self.client.put('/api/blog-5', json=data, headers=headers)
+        html = self.client.get('/blog-5').get_data(as_text=True)
+        self.assertTrue('&lt;script&gt;alert(1)&lt;/script&gt;</p>' in html)
+        self.assertTrue('<script>alert' not in html)
+        self.assertTrue('javascript:' not in html and 'style="color: red"' in html)
+
+        # unpublished posts keep no rendered body
+        self.client.put('/api/blog-5', json=dict(data, published=False), headers=headers)
+        self.assertTrue(Post.query.filter_by(id=5).first().body_html is None)
+
+    def test_blog_most_recent(self):
+        # the newest two posts with their users, including the rendered body
+        with self.assertQueryCount(1):
+            response = self.client.get('/blog-0')
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(b'post 9' in response.data)
+
+    def test_api_blog_post(self):
+        # the post with its blocks, then its position in the dashboard list
+        with self.assertQueryCount(2):
+            response = self.client.get(
+                '/api/blog-5',
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertTrue(response.status_code == 200)
+        contents = response.get_json()['contents']
+        self.assertTrue([c['order'] for c in contents] == list(range(5)))
+
+    def test_blog_index_pages(self):
+        with self.assertQueryCount(1):
+            response = self.client.get('/blog?limit=4')
+        html = response.get_data(as_text=True)
+        self.assertTrue('post 9' in html and 'post 6' in html and 'post 5' not in html)
+        self.assertTrue('Older posts' in html)
+
+        seen = []
+        url = '/blog?limit=4'
+        while url:
+            html = self.client.get(url).get_data(as_text=True)
+            seen += [i for i in reversed(range(10)) if f'post {i}<' in html]
+            marker = 'href="/blog?'
+            url = '/blog?' + html.split(marker)[1].split('"')[0].replace('&amp;', '&') \
+                if marker in html else None
+        self.assertTrue(seen == list(reversed(range(10))))
+        self.assertTrue(self.client.get('/blog?limit=4&cursor=junk').status_code == 400)
+
+    def test_api_blog_pages(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        everything = self.client.get('/api/blog', headers=headers).get_json()
+        self.assertTrue(len(everything) == 10)
+
+        page = self.client.get('/api/blog?limit=6', headers=headers).get_json()
+        self.assertTrue(page['items'] == everything[:6])
+        page = self.client.get(
+            f'/api/blog?limit=6&cursor={page["next"]}', headers=headers
+        ).get_json()
+        self.assertTrue(page['items'] == everything[6:])
+        self.assertTrue(page['next'] is None)
+
+        # a cursor holding a value of the wrong type for the sort column
+        crafted = encode_cursor({'order': 1}, 1, 5)
+        for bad in ('limit=0', 'limit=5&cursor=junk', f'limit=5&cursor={crafted}'):
+            response = self.client.get(f'/api/blog?{bad}', headers=headers)
+            self.assertTrue(response.status_code == 400)
@@ -0,0 +1,78 @@
+import unittest
+from app import create_app, db
+from app.cache import ModelCache, version, bump
+from app.models import Quote, Node
+
+
+class CacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_version(self):
+        start = version(Quote, Node)
+        self.assertTrue(version(Quote, Node) == version('quotes', 'nodes'))
+
+        # uncommitted and rolled back writes don't count
+        db.session.add(Quote(text='a'))
+        db.session.flush()
+        self.assertTrue(version(Quote, Node) == start)
+        db.session.rollback()
+        db.session.commit()
+        self.assertTrue(version(Quote, Node) == start)
+
+        Quote.new()
+        after_quote = version(Quote, Node)
+        self.assertTrue(after_quote[1] > start[1])
+        self.assertTrue(after_quote[2] == start[2])
+
+        # bulk and core statements are tracked too
+        Quote.query.update({Quote.published: True})
+        db.session.commit()
+        db.session.execute(Node.__table__.insert(), [{'title': 'a'}])
+        db.session.commit()
+        end = version(Quote, Node)
+        self.assertTrue(end[1] > after_quote[1])
+        self.assertTrue(end[2] > after_quote[2])
+
+        bump(Node)
+        self.assertTrue(version(Node)[1] == end[2] + 1)
+
+    def test_model_cache(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return [q.text for q in Quote.query.all()]
+
+        cache = ModelCache(build, Quote)
+        self.assertTrue(cache.get() == [])
+        self.assertTrue(cache.get() == [])
+        self.assertTrue(len(calls) == 1)
+
+        # writes to other tables leave it alone
+        Node.new()
+        cache.get()
+        self.assertTrue(len(calls) == 1)
+
+        db.session.add(Quote(text='a'))
+        db.session.commit()
+        self.assertTrue(cache.get() == ['a'])
+        self.assertTrue(len(calls) == 2)
+
+        cache.clear()
+        cache.get()
+        self.assertTrue(len(calls) == 3)
+
+        cache = ModelCache(build, Quote, max_age=0)
+        cache.get()
+        cache.get()
+        self.assertTrue(len(calls) == 5)
@@ -4,10 +4,12 @@ from flask import current_app
 from werkzeug.exceptions import HTTPException
 from app import create_app, db
 from app.models import User, Quote, Resource, Video, Post, Node
+from app.utils.get_preview_text import get_preview_text
+from .helpers import QueryCountMixin
 
 
 
-class MixinTestCase(unittest.TestCase):
+class MixinTestCase(QueryCountMixin, unittest.TestCase):
 
     def setUp(self):
         self.app = create_app('testing')
@@ -62,6 +64,53 @@ class MixinTestCase(unittest.TestCase):
                 self.assertTrue(r['primary'] == '' or r['primary'])
                 self.assertTrue(r['secondary'] == '' or r['primary'])
 
+    def test_get_all_private_projection(self):
+        texts = [
+            'word ' * 30,
+            'x' * 51,
+            'y' * 50,
+            'short, then a much longer tail that runs past fifty characters',
+        ]
+        for Model in (Quote, Resource, Video, Node):
+            for i, text in enumerate(texts):
+                entry = Model.query.offset(i).first()
+                entry.text = text
+            db.session.commit()
+            db.session.expunge_all()
+
+            with self.assertQueryCount(1):
+                rows = Model.get_all_private()
+            # only plain rows were read, nothing for the session to track
+            self.assertTrue(len(db.session.identity_map) == 0)
+            self.assertTrue([r['secondary'] for r in rows[:4]] == [
+                get_preview_text(t, 50) for t in texts
+            ])
+            self.assertTrue([r['order'] for r in rows] == list(range(len(rows))))
+
+    def test_private_page(self):
+        for Model in (Quote, Resource, Video, Node, Post):
+            everything = Model.get_all_private()
+            pages = []
+            cursor = None
+            while True:
+                with self.assertQueryCount(1):
+                    page = Model.private_page(limit=10, cursor=cursor)
+                pages.append(page.items)
+                cursor = page.next
+                if cursor is None:
+                    break
+            self.assertTrue([len(p) for p in pages] == [10, 10, 6])
+            self.assertTrue([r for p in pages for r in p] == everything)
+
+        # rows moved past the cursor still turn up on a later page
+        first = Quote.private_page(limit=5)
+        Quote.move(first.items[0]['id'], 20)
+        rest = Quote.private_page(limit=30, cursor=first.next).items
+        self.assertTrue(first.items[0]['id'] in [r['id'] for r in rest])
+
+        with self.assertRaises(ValueError):
+            Quote.private_page(limit=5, cursor='not a cursor')
+
     def test_to_json(self):
         models = [Quote, Resource, Video, Node, Post]
         for model in models:
@@ -69,8 +118,35 @@ class MixinTestCase(unittest.TestCase):
             self.assertTrue(q.to_json())
 
 
+    def test_to_json_order_is_position(self):
+        # the stored keys are spread out, but the editor sees positions, as
+        # the dashboard list does
+        for model in (Quote, Resource, Node, Post):
+            model.rebalance_order(min_gap=model.ORDER_GAP + 1)
+            self.assertTrue(model.get_by_order(3)['order'] == 3)
+        # get_by_order already knows the position, get_by_id counts it
+        for model in (Quote, Resource):
+            with self.assertQueryCount(1):
+                id = model.get_by_order(3)['id']
+            self.assertTrue(model.get_by_id(id)['order'] == 3)
+
     def test_update_by_id(self):
-        pass # specific logic per model
+        # specific logic per model; a resource is moved to the order it was sent with
+        data = Resource.get_by_order(2)
+        commits = []
+
+        def count(session):
+            commits.append(session)
+        db.event.listen(db.session, 'after_commit', count)
+        try:
+            saved = Resource.update_by_id(data['id'], dict(data, order=5, title='moved'))
+        finally:
+            db.event.remove(db.session, 'after_commit', count)
+        # the edit and the move are saved together
+        self.assertTrue(len(commits) == 1 and saved['order'] == 5)
+        self.assertTrue(Resource.get_by_order(5)['id'] == data['id'])
+        self.assertTrue(Resource.get_by_order(5)['title'] == 'moved')
+        self.assertTrue(Resource.get_by_order(2)['id'] != data['id'])
 
     def test_get_by_id(self):
         models = [Quote, Resource, Video, Node, Post]
@@ -142,17 +218,127 @@ class MixinTestCase(unittest.TestCase):
         models = [Quote, Resource, Video, Node, Post]
         for model in models:
             id_list = {
-                d.id: d.order for d in model.query.all()
+                d['id']: d['order'] for d in model.get_all_private()
             }
             # insert at the beginning
             if model == Post:
                 model.new_by_order(0, 1)
             else:
                 model.new_by_order(0)
-            new_list = model.query.all()
+            new_list = model.get_all_private()
             self.assertTrue(
                 len(new_list) == len(id_list) + 1
             )
             for d in new_list:
-                if id_list.get(d.id, None):
-                    self.assertTrue(d.order == id_list[d.id]+1)
+                if d['id'] in id_list:
+                    self.assertTrue(d['order'] == id_list[d['id']]+1)
+                else:
+                    self.assertTrue(d['order'] == 0)
+
+    def test_new_by_order_touches_one_row(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            model.rebalance_order()
+            keys = {d.id: d.order for d in model.query.all()}
+            if model == Post:
+                model.new_by_order(10, 1)
+            else:
+                model.new_by_order(10)
+            for d in model.query.all():
+                if d.id in keys:
+                    self.assertTrue(d.order == keys[d.id])
+            ids = [d['id'] for d in model.get_all_private()]
+            self.assertTrue(ids[10] not in keys)
+            self.assertTrue(ids[:10] + ids[11:] == sorted(keys, key=keys.get))
+
+    def test_new_by_order_without_gap(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            # the seeded orders are packed one apart
+            before = [d['id'] for d in model.get_all_private()]
+            if model == Post:
+                model.new_by_order(10, 1)
+            else:
+                model.new_by_order(10)
+            after = [d['id'] for d in model.get_all_private()]
+            self.assertTrue(after[:10] + after[11:] == before)
+            self.assertTrue(after[10] not in before)
+
+    def test_update_batch_single_move(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            model.rebalance_order()
+            keys = {d.id: d.order for d in model.query.all()}
+            before = [d['id'] for d in model.get_all_private()]
+            moved = before[3]
+            model.update_batch([{'id': moved, 'order': 20}])
+            after = [d['id'] for d in model.get_all_private()]
+            self.assertTrue(after[20] == moved)
+            self.assertTrue([i for i in after if i != moved] == [i for i in before if i != moved])
+            changed = [d.id for d in model.query.all() if d.order != keys[d.id]]
+            self.assertTrue(changed == [moved])
+
+    def test_update_batch_missing_id(self):
+        with self.assertRaises(HTTPException):
+            Quote.update_batch([{'id': 1234, 'order': 0}])
+
+    def test_rebalance_order(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            before = [d['id'] for d in model.get_all_private()]
+            # seeded orders are packed one apart, so the first pass respaces them
+            self.assertTrue(model.rebalance_order() == 26)
+            self.assertTrue(model.rebalance_order() == 0)
+            self.assertTrue([d['id'] for d in model.get_all_private()] == before)
+
+    def test_delete_closes_gap(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            to_del = model.query.filter_by(order=10).first()
+            model.delete(to_del.id)
+            orders = [d['order'] for d in model.get_all_private()]
+            self.assertTrue(orders == list(range(25)))
+
+    def test_new_appends_at_end(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            if model == Post:
+                model.new(1)
+            else:
+                model.new()
+            newest = model.query.order_by(model.id.desc()).first()
+            self.assertTrue(model.get_all_private()[-1]['id'] == newest.id)
+
+    def test_update_batch_statement_count(self):
+        data = [
+            {'id': i, 'order': j}
+            for i, j in zip(range(1, 27), range(25, -1, -1))
+        ]
+        # lock/check the targets, read the keys, one CASE update, and the
+        # generation of quotes
+        with self.assertQueryCount(4):
+            Quote.update_batch(data)
+        self.assertTrue(
+            [d['id'] for d in Quote.get_all_private()] == list(range(26, 0, -1))
+        )
+
+    def test_move(self):
+        models = [Quote, Resource, Video, Node, Post]
+        for model in models:
+            model.rebalance_order()
+            keys = {d.id: d.order for d in model.query.all()}
+            before = [d['id'] for d in model.get_all_private()]
+            changed = model.move(before[3], 20)
+            after = [d['id'] for d in model.get_all_private()]
+            self.assertTrue(after[20] == before[3])
+            self.assertTrue(changed == [
+                {'id': id, 'order': i} for i, id in enumerate(after) if 3 <= i <= 20
+            ])
+            moved_keys = [d.id for d in model.query.all() if d.order != keys[d.id]]
+            self.assertTrue(moved_keys == [before[3]])
+            # moving back up, and past the end of the list
+            self.assertTrue(model.move(before[3], 3)[0] == {'id': before[3], 'order': 3})
+            self.assertTrue(model.move(before[3], 1234)[-1] == {'id': before[3], 'order': 25})
+            self.assertTrue(model.move(before[3], 25) == [])
+            with self.assertRaises(HTTPException):
+                model.move(1234, 0)
@@ -0,0 +1,180 @@
+import threading
+import unittest
+from werkzeug.exceptions import HTTPException
+from app import create_app, db
+from app.models import Node, NodeLink, term_index
+from .helpers import QueryCountMixin
+
+
+class NodeTestCase(QueryCountMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        nodes = [
+            Node(title='happy', definition='glad', published=True, order=1024,
+                synonyms=['glad', 'cheerful'], antonyms=['sad']),
+            Node(title='glad', published=True, order=2048, synonyms=['happy']),
+            Node(title='sad', published=True, order=3072, antonyms=['happy']),
+            Node(title='cheerful', published=False, order=4096),
+        ]
+        db.session.add_all(nodes)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_get_alt_term(self):
+        term = Node.get_alt_term(None)
+        self.assertTrue(term['title'] == 'happy')
+        self.assertTrue(term['text'] == 'glad')
+        # unpublished and missing nodes resolve to None
+        self.assertTrue(term['synonyms'] == [('glad', 2), ('cheerful', None)])
+        self.assertTrue(term['antonyms'] == [('sad', 3)])
+
+        self.assertTrue(Node.get_alt_term(3)['antonyms'] == [('happy', 1)])
+        with self.assertRaises(HTTPException):
+            Node.get_alt_term(1234)
+
+    def test_get_alt_term_cached_index(self):
+        Node.get_alt_term(None)
+        # with the title index built, only the node itself is loaded
+        with self.assertQueryCount(1):
+            Node.get_alt_term(1)
+
+        Node.update_by_id(4, {
+            'title': 'cheerful', 'text': '', 'example': '', 'published': True,
+            'synonyms': [], 'antonyms': []
+        })
+        self.assertTrue(
+            Node.get_alt_term(1)['synonyms'] == [('glad', 2), ('cheerful', 4)]
+        )
+
+        Node.delete(2)
+        self.assertTrue(
+            Node.get_alt_term(1)['synonyms'] == [('glad', None), ('cheerful', 4)]
+        )
+
+    def test_links(self):
+        node = Node.query.filter_by(title='happy').first()
+        node.add_synonym('joyful')
+        node.add_antonym('glum')
+        db.session.commit()
+        node = Node.query.filter_by(title='happy').first()
+        self.assertTrue(node.synonyms == ['glad', 'cheerful', 'joyful'])
+        self.assertTrue(node.antonyms == ['sad', 'glum'])
+
+        self.assertTrue(node.del_synonym(1))
+        self.assertTrue(node.del_antonym(0))
+        with self.assertRaises(IndexError):
+            node.del_antonym(3)
+        db.session.commit()
+        node = Node.query.filter_by(title='happy').first()
+        self.assertTrue(node.synonyms == ['glad', 'joyful'])
+        self.assertTrue(node.antonyms == ['glum'])
+
+        node.antonyms = []
+        self.assertFalse(node.del_antonym(0))
+        db.session.commit()
+        self.assertTrue(NodeLink.query.filter_by(source_id=node.id).count() == 2)
+
+        # deleting a node takes its links with it
+        Node.delete(node.id)
+        self.assertTrue(NodeLink.query.filter_by(source_id=node.id).count() == 0)
+
+    def test_linked_from(self):
+        self.assertTrue(
+            sorted(n.title for n in Node.linked_from('happy')) == ['glad', 'sad']
+        )
+        self.assertTrue(
+            [n.title for n in Node.linked_from('happy', 'antonym')] == ['sad']
+        )
+        self.assertTrue(Node.linked_from('nothing') == [])
+
+    def test_rename_follows_links(self):
+        Node.update_by_id(1, {
+            'title': 'joyful', 'text': 'glad', 'example': '', 'published': True,
+            'synonyms': ['glad', 'cheerful'], 'antonyms': ['sad']
+        })
+        self.assertTrue(Node.query.filter_by(title='glad').first().synonyms == ['joyful'])
+        self.assertTrue(Node.query.filter_by(title='sad').first().antonyms == ['joyful'])
+        self.assertTrue(Node.get_alt_term(2)['synonyms'] == [('joyful', 1)])
+
+    def test_get_alt_term_normalized(self):
+        node = Node.query.filter_by(title='sad').first()
+        node.add_synonym('Glad ')
+        node.add_synonym('un  HAPPY')
+        db.session.commit()
+        self.assertTrue(Node.get_alt_term(3)['synonyms'] == [('Glad ', 2), ('un  HAPPY', None)])
+
+    def test_search(self):
+        self.assertTrue(Node.search('HA') == [{'id': 1, 'title': 'happy'}])
+        # prefix matches come first, then close spellings
+        self.assertTrue(Node.search('gla') == [{'id': 2, 'title': 'glad'}])
+        self.assertTrue(Node.search('hapy') == [{'id': 1, 'title': 'happy'}])
+        self.assertTrue(Node.search('cheer') == [])
+        self.assertTrue(Node.search('cheer', published_only=False) == [{'id': 4, 'title': 'cheerful'}])
+        self.assertTrue(Node.search('  ') == [])
+
+    def test_search_index_follows_edits(self):
+        index = term_index.get()
+        node = Node.query.filter_by(title='cheerful').first()
+        node.title = 'Jolly'
+        node.published = True
+        db.session.add(Node(title='joyful', published=True))
+        db.session.commit()
+        Node.delete(1)
+
+        with self.assertQueryCount(0):
+            results = Node.search('jo')
+        self.assertTrue(results == [{'id': 4, 'title': 'Jolly'}, {'id': 5, 'title': 'joyful'}])
+        self.assertTrue(Node.search('happy') == [])
+        # patched rather than rebuilt, on a copy so searches already running
+        # on the old index are left alone
+        self.assertTrue(index.search('jo') == [])
+
+        # a rolled back edit leaves the index alone
+        node = Node.query.get(2)
+        node.title = 'gone'
+        db.session.flush()
+        db.session.rollback()
+        self.assertTrue(Node.search('glad') == [{'id': 2, 'title': 'glad'}])
+
+    def test_search_during_edits(self):
+        term_index.get()
+        errors = []
+        done = threading.Event()
+
+        def search():
+            # threads serving /api/thesaurus/search, reading whichever index
+            # is current while edits are patched in
+            with self.app.app_context():
+                while not done.is_set():
+                    try:
+                        term_index.get().search('wor', published_only=False)
+                        term_index.get().fuzzy('word', published_only=False)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+
+        threads = [threading.Thread(target=search) for _ in range(4)]
+        for t in threads:
+            t.start()
+        try:
+            for i in range(20):
+                db.session.add_all([Node(title=f'word {i} {j}') for j in range(5)])
+                db.session.commit()
+                for node in Node.query.filter(Node.title.like(f'word {i} %')):
+                    node.title = f'wordy {i} {node.id}'
+                db.session.commit()
+        finally:
+            done.set()
+            for t in threads:
+                t.join()
+        self.assertTrue(errors == [])
+        self.assertTrue(len(Node.search('wordy', 500, published_only=False)) == 100)
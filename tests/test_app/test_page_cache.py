@@ -0,0 +1,188 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app import create_app, db, page_cache
+from app.cache import LRUStore, ModelCache, PageEntry, SingleFlight, SQLiteStore, bump
+from app.models import Quote, Video
+from .helpers import QueryCountMixin
+
+
+class PageCacheTestCase(QueryCountMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config['PAGE_CACHE_TYPE'] = 'lru'
+        page_cache.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        db.session.add_all([
+            Quote(text=f'quote {i}', author='someone', published=True, order=i)
+            for i in range(3)
+        ])
+        db.session.add(Video(title='video', published=True, order=0))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_hit_and_miss(self):
+        response = self.client.get('/api/qt-data')
+        self.assertTrue(response.headers['X-Cache'] == 'MISS')
+
+        with self.assertQueryCount(0):
+            cached = self.client.get('/api/qt-data')
+        self.assertTrue(cached.headers['X-Cache'] == 'HIT')
+        self.assertTrue(cached.get_json() == response.get_json())
+        self.assertTrue(cached.content_type == response.content_type)
+
+        # the query string is part of the key
+        paged = self.client.get('/api/qt-data?limit=1')
+        self.assertTrue(paged.headers['X-Cache'] == 'MISS')
+        self.assertTrue(len(paged.get_json()['items']) == 1)
+        self.assertTrue(page_cache.stats() == {'hits': 1, 'misses': 2, 'stale': 0, 'entries': 2})
+
+    def test_commit_invalidates(self):
+        self.client.get('/api/qt-data')
+        self.client.get('/videos')
+
+        quote = Quote.query.first()
+        quote.text = 'changed'
+        db.session.commit()
+
+        response = self.client.get('/api/qt-data')
+        self.assertTrue(response.headers['X-Cache'] == 'MISS')
+        self.assertTrue('changed' in [q['text'] for q in response.get_json()])
+        # pages that don't read quotes are still served from the cache
+        self.assertTrue(self.client.get('/videos').headers['X-Cache'] == 'HIT')
+
+        # rolled back writes change nothing
+        Quote.query.update({Quote.text: 'rolled back'})
+        db.session.rollback()
+        self.assertTrue(self.client.get('/api/qt-data').headers['X-Cache'] == 'HIT')
+
+    def test_stale_while_rendering(self):
+        response = self.client.get('/api/qt-data')
+        Quote.query.first().text = 'changed'
+        db.session.commit()
+
+        # while another request renders the new page, the old one is sent
+        with page_cache.store.flight.claim('/api/qt-data?'):
+            stale = self.client.get('/api/qt-data')
+        self.assertTrue(stale.headers['X-Cache'] == 'STALE')
+        self.assertTrue(stale.get_json() == response.get_json())
+
+        fresh = self.client.get('/api/qt-data')
+        self.assertTrue(fresh.headers['X-Cache'] == 'MISS')
+        self.assertTrue('changed' in [q['text'] for q in fresh.get_json()])
+        self.assertTrue(page_cache.stats()['stale'] == 1)
+
+    def test_errors_not_cached(self):
+        self.client.get('/blog-1234')
+        self.assertTrue(self.client.get('/blog-1234').status_code == 404)
+        self.assertTrue(page_cache.stats()['entries'] == 0)
+
+    def test_max_age(self):
+        self.client.get('/api/qt-data')
+        self.app.config['PAGE_CACHE_MAX_AGE'] = -1
+        self.assertTrue(self.client.get('/api/qt-data').headers['X-Cache'] == 'MISS')
+
+
+class PageStoreTestCase(unittest.TestCase):
+
+    def entry(self, body):
+        return PageEntry((0, 1), 1.5, 200, [('Content-Type', 'text/html')], body)
+
+    def test_lru_store(self):
+        store = LRUStore(size=2)
+        store.set('/a', self.entry(b'a'))
+        store.set('/b', self.entry(b'b'))
+        store.get('/a')
+        store.set('/c', self.entry(b'c'))
+        self.assertTrue(len(store) == 2)
+        self.assertTrue(store.get('/b') is None)
+        self.assertTrue(store.get('/a').body == b'a')
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pages.sqlite')
+            store = SQLiteStore(path, size=2)
+            for i, key in enumerate(['/a', '/b', '/c']):
+                store.set(key, self.entry(key.encode())._replace(stored_at=i))
+            self.assertTrue(len(store) == 2)
+            self.assertTrue(store.get('/a') is None)
+
+            # entries outlive the store that wrote them
+            other = SQLiteStore(path)
+            entry = other.get('/c')
+            self.assertTrue(entry == self.entry(b'/c')._replace(stored_at=2))
+
+            # and stores on the same file render a page one at a time
+            with store.flight.claim('/c'):
+                with other.flight.claim('/c', wait=False) as leader:
+                    self.assertTrue(not leader)
+
+
+class SingleFlightTestCase(unittest.TestCase):
+
+    def test_one_build_per_burst(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.05)
+            return len(builds)
+
+        cache = ModelCache(build, 'single_flight_test')
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(len(builds) == 1 and results == [1] * 8)
+
+    def test_serve_stale(self):
+        building = threading.Event()
+        release = threading.Event()
+        values = iter(['old', 'new'])
+
+        def build():
+            value = next(values)
+            if value == 'new':
+                building.set()
+                release.wait(5)
+            return value
+
+        cache = ModelCache(build, 'serve_stale_test', serve_stale=True)
+        self.assertTrue(cache.get() == 'old')
+        bump('serve_stale_test')
+        leader = threading.Thread(target=cache.get)
+        leader.start()
+        building.wait(5)
+        self.assertTrue(cache.get() == 'old')
+        release.set()
+        leader.join()
+        self.assertTrue(cache.get() == 'new')
+
+    def test_lock_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            # as two worker processes would, each with its own thread locks
+            worker_a, worker_b = SingleFlight(tmp), SingleFlight(tmp)
+            with worker_a.claim('key') as leader:
+                self.assertTrue(leader)
+                with worker_b.claim('key', wait=False) as leader:
+                    self.assertTrue(not leader)
+                with worker_b.claim('other', wait=False) as leader:
+                    self.assertTrue(leader)
+            with worker_b.claim('key', wait=False) as leader:
+                self.assertTrue(leader)
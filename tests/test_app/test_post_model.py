@@ -0,0 +1,171 @@
+import unittest
+from datetime import datetime, timedelta
+from werkzeug.exceptions import HTTPException
+from app import create_app, db
+from app.models import User, Post, PostContents
+from app.utils.block_hash import block_hash
+from .helpers import QueryCountMixin
+
+
+class PostTestCase(QueryCountMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(
+            email='myemail@gmail.edu',
+            username='username',
+            first_name='Hieronymus',
+            last_name='Kapsberger'
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        # posts 1-6, one day apart, with 3 and 5 left unpublished.
+        # posts 6 and 4 share a timestamp so ties fall back to id
+        start = datetime(2021, 1, 1)
+        dates = [0, 1, 2, 3, 4, 3]
+        posts = [
+            Post(
+                title=f'post {i + 1}',
+                author_id=user.id,
+                published=i + 1 not in (3, 5),
+                date_created=start + timedelta(days=d),
+                order=i
+            ) for i, d in enumerate(dates)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        for p in posts:
+            db.session.add(PostContents(
+                post_id=p.id, order=0, content_type='p', payload=p.title
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_get_by_id_public(self):
+        # published posts by date: 1, 2, 4, 6
+        response = Post.get_by_id_public(1)
+        self.assertTrue(response.prev_post_id is None)
+        self.assertTrue(response.next_post_id == 2)
+
+        response = Post.get_by_id_public(2)
+        self.assertTrue(response.prev_post_id == 1)
+        self.assertTrue(response.next_post_id == 4)
+
+        response = Post.get_by_id_public(4)
+        self.assertTrue(response.prev_post_id == 2)
+        self.assertTrue(response.next_post_id == 6)
+
+        response = Post.get_by_id_public(6)
+        self.assertTrue(response.prev_post_id == 4)
+        self.assertTrue(response.next_post_id is None)
+        self.assertTrue('>post 6</p>' in response.content)
+        self.assertTrue(response.metadata['author'] == 'Hieronymus Kapsberger')
+
+        with self.assertRaises(HTTPException):
+            Post.get_by_id_public(3)
+        with self.assertRaises(HTTPException):
+            Post.get_by_id_public(1234)
+
+    def test_get_most_recent(self):
+        response = Post.get_most_recent()
+        self.assertTrue(response.metadata['title'] == 'post 6')
+        self.assertTrue(response.prev_post_id == 4)
+        self.assertTrue(response.next_post_id is None)
+
+        Post.query.update({Post.published: False})
+        db.session.commit()
+        response = Post.get_most_recent()
+        self.assertTrue(response.content is None)
+        self.assertTrue(response.prev_post_id is None)
+
+    def test_listing_fields(self):
+        Post.new(1)
+        post = Post.query.order_by(Post.id.desc()).first()
+        self.assertTrue(post.author_display == 'Hieronymus Kapsberger')
+        self.assertTrue(post.pub_date_display == post.pub_date)
+        self.assertTrue(post.preview_text == '')
+
+        contents = [
+            {
+                'id': None, 'post_id': post.id, 'order': i, 'content_type': t,
+                'payload': p, 'uri': None, 'css': None
+            }
+            for i, (t, p) in enumerate([('p', 'first'), ('h2', 'heading'), ('p', 'second')])
+        ]
+        Post.update_by_id(post.id, {
+            'title': 'new', 'sub_title': '', 'published': True,
+            'update_timestamp': False, 'contents': contents
+        })
+        post = Post.query.filter_by(id=post.id).first()
+        self.assertTrue(post.preview_text == 'first second')
+        listing = {p['id']: p for p in Post.get_all()}
+        self.assertTrue(listing[post.id]['text'] == 'first second')
+        self.assertTrue(listing[post.id]['author'] == 'Hieronymus Kapsberger')
+
+    def test_update_contents_diff(self):
+        def block(id, order, payload, content_type='p'):
+            return {
+                'id': id, 'post_id': 1, 'order': order, 'content_type': content_type,
+                'payload': payload, 'uri': None, 'css': None
+            }
+
+        def save(contents):
+            return Post.update_by_id(1, {
+                'title': 'post 1', 'sub_title': None, 'published': True,
+                'update_timestamp': False, 'contents': contents
+            })['contents']
+
+        first = PostContents.query.filter_by(post_id=1).first()
+        contents = save([block(first.id, 0, 'post 1')] + [
+            block(None, i, f'block {i}') for i in range(1, 6)
+        ])
+        self.assertTrue([c['payload'] for c in contents] == ['post 1'] + [
+            f'block {i}' for i in range(1, 6)
+        ])
+        self.assertTrue(all(c['id'] for c in contents))
+
+        # new blocks go in with one INSERT, and identical ones get ids of their own
+        # (edits also bump the generations of the tables they wrote)
+        with self.assertQueryCount(7) as statements:
+            twins = save(contents + [block(None, 6, 'twin'), block(None, 7, 'twin')])
+        self.assertTrue(len([s for s in statements if s.startswith('INSERT')]) == 1)
+        self.assertTrue(twins[:6] == contents)
+        self.assertTrue(twins[6]['id'] and twins[7]['id'] and twins[6]['id'] != twins[7]['id'])
+        contents = save(contents)
+
+        # an unchanged save reads the post with its author, the block hashes,
+        # and counts the posts before it for its position
+        with self.assertQueryCount(3) as statements:
+            self.assertTrue(save(contents) == contents)
+        self.assertTrue(not any('post_contents' in s for s in statements if 'SELECT' not in s))
+
+        # one edited block, one moved block, one removed and one new
+        edited = [dict(c) for c in contents]
+        edited[2]['payload'] = 'edited'
+        edited[4]['order'] = 9
+        del edited[5]
+        edited.append(block(None, 7, 'new', 'h2'))
+        # and one to read back the new block's id
+        with self.assertQueryCount(10) as statements:
+            saved = save(edited)
+        writes = [s.split()[0] for s in statements if 'post_contents' in s and 'SELECT' not in s]
+        self.assertTrue(sorted(writes) == ['DELETE', 'INSERT', 'UPDATE', 'UPDATE'])
+        self.assertTrue([c['order'] for c in saved] == [0, 1, 2, 3, 7, 9])
+
+        db.session.expire_all()
+        stored = Post.query.filter_by(id=1).first()
+        self.assertTrue(stored.get_contents() == saved)
+        self.assertTrue(stored.preview_text == 'post 1 block 1 edited block 3 block 4')
+        self.assertTrue(
+            all(c.content_hash == block_hash(c.content_type, c.payload, c.uri, c.css)
+                for c in stored.contents)
+        )
@@ -0,0 +1,138 @@
+import re
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from app import create_app, db
+from app.models import User, Quote, Post, PostContents, Node, NodeLink, Video, Resource
+
+ROWS = 2000
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    """
+    Seeds every table with enough rows for the planner to care, runs each
+    public listing, then EXPLAINs every SELECT it issued. Runs against
+    whatever TEST_DATABASE_URL points at (SQLite by default, or MySQL).
+    """
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.execute(User.__table__.insert(), [
+            {'email': f'{i}@b.c', 'username': f'user{i}', 'first_name': 'A', 'last_name': 'B'}
+            for i in range(ROWS)
+        ])
+        start = datetime(2020, 1, 1)
+        for Model in (Quote, Video, Resource):
+            db.session.execute(Model.__table__.insert(), [
+                {'title': f'title {i}', 'published': i % 2 == 0, 'order': i}
+                if Model != Quote else
+                {'text': f'text {i}', 'published': i % 2 == 0, 'order': i}
+                for i in range(ROWS)
+            ])
+        db.session.execute(Node.__table__.insert(), [
+            {'title': f'word{i}', 'published': i % 2 == 0, 'order': i}
+            for i in range(ROWS)
+        ])
+        db.session.execute(NodeLink.__table__.insert(), [
+            {'source_id': i + 1, 'target': f'word{i + d}', 'kind': kind, 'position': d}
+            for i in range(ROWS)
+            for d, kind in ((1, 'synonym'), (2, 'synonym'), (3, 'antonym'))
+        ])
+        db.session.execute(Post.__table__.insert(), [
+            {
+                'title': f'post {i}', 'published': i % 2 == 0, 'order': i,
+                'author_id': i + 1, 'date_created': start + timedelta(days=i)
+            }
+            for i in range(ROWS)
+        ])
+        db.session.execute(PostContents.__table__.insert(), [
+            {'post_id': i // 4 + 1, 'order': i % 4, 'content_type': 'p', 'payload': 'text'}
+            for i in range(ROWS * 4)
+        ])
+        db.session.commit()
+        if db.engine.dialect.name == 'sqlite':
+            db.session.execute(text('ANALYZE'))
+        else:
+            for table in db.metadata.sorted_tables:
+                db.session.execute(text(f'ANALYZE TABLE {table.name}'))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def capture(self, func):
+        """returns (statement, parameters) for every SELECT issued by func"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            func()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return statements
+
+    def full_scans(self, statement, parameters):
+        """returns the tables a statement reads without using an index"""
+        conn = db.session.connection().connection
+        cursor = conn.cursor()
+        if db.engine.dialect.name == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            # 'SEARCH quotes USING INDEX ...' seeks into an index, while
+            # 'SCAN quotes' or 'SCAN quotes USING INDEX ...' walks all of it.
+            # scans over an already limited subquery (anon_1) are fine
+            details = [row[-1] for row in cursor.fetchall()]
+            return [
+                d for d in details
+                if d.startswith('SCAN') and not re.match(r'SCAN (CONSTANT|SUBQUERY|anon_)', d)
+            ]
+        cursor.execute('EXPLAIN ' + statement, parameters)
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return [
+            r['table'] for r in rows
+            if r['type'] == 'ALL' and not r['table'].startswith('<derived')
+        ]
+
+    def assert_indexed(self, name, func):
+        statements = self.capture(func)
+        self.assertTrue(statements, f'{name} ran no queries')
+        for statement, parameters in statements:
+            scans = self.full_scans(statement, parameters)
+            self.assertFalse(scans, f'{name} scans {scans}:\n{statement}')
+
+    def test_public_listings(self):
+        node = Node.query.filter_by(published=True).first()
+        post = Post.query.filter_by(published=True).offset(ROWS // 4).first()
+        # later pages seek straight to the cursor
+        cursors = {
+            'quotes': Quote.public_page(50).next,
+            'posts': Post.public_page(50).next,
+            'nodes': Node.private_page(50).next,
+        }
+        listings = {
+            'Quote.to_dict_list': Quote.to_dict_list,
+            'Post.get_all': Post.get_all,
+            'Post.get_most_recent': Post.get_most_recent,
+            'Post.get_by_id_public': lambda: Post.get_by_id_public(post.id),
+            'Video.get_all': Video.get_all,
+            'Resource.get_all': Resource.get_all,
+            'Node.get_alt_term(None)': lambda: Node.get_alt_term(None),
+            'Node.get_alt_term(id)': lambda: Node.get_alt_term(node.id),
+            'Node.to_dict': Node.to_dict,
+            'Node.linked_from': lambda: Node.linked_from('word10'),
+            'Quote.public_page': lambda: Quote.public_page(50, cursors['quotes']),
+            'Post.public_page': lambda: Post.public_page(50, cursors['posts']),
+            'Node.private_page': lambda: Node.private_page(50, cursors['nodes']),
+        }
+        for name, func in listings.items():
+            db.session.expire_all()
+            self.assert_indexed(name, func)
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db, page_cache, shared_cache
+from app.cache import ModelCache, bump, version
+from app.models import CacheGeneration, Node, Quote, graph_index, title_index
+from app.shared_cache import SharedStore
+
+
+class SharedCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.app = create_app('testing')
+        self.app.config['SHARED_CACHE_PATH'] = self.path
+        shared_cache.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        node = Node(title='happy', definition='glad', published=True, order=0)
+        node.synonyms = ['glad', 'cheerful']
+        db.session.add(node)
+        db.session.add(Quote(text='quote', author='someone', published=True, order=0))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(self.path)
+
+    def test_generations(self):
+        generations = CacheGeneration.current()
+        self.assertTrue(generations['nodes'] == 1 and generations['quotes'] == 1)
+        # every table has its row from the start, so bumping never inserts
+        self.assertTrue(set(generations) == set(db.metadata.tables) - {'cache_generations'})
+        self.assertTrue(generations['videos'] == 0)
+
+        Quote.query.first().text = 'changed'
+        db.session.commit()
+        Quote.query.update({Quote.text: 'rolled back'})
+        db.session.rollback()
+        generations = CacheGeneration.current()
+        self.assertTrue(generations['quotes'] == 2)
+        self.assertTrue(generations['nodes'] == 1)
+
+    def test_one_build_for_every_worker(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {'n': len(builds)}, b'payload %d' % len(builds)
+
+        worker_a = shared_cache.store
+        # a second worker process, with its own mappings and generations
+        worker_b = SharedStore(self.path, interval=0)
+        meta, payload = worker_a.fetch('key', build, Node)
+        self.assertTrue(isinstance(payload, memoryview))
+        self.assertTrue(bytes(payload) == b'payload 1')
+        meta, payload = worker_b.fetch('key', build, Node)
+        self.assertTrue(len(builds) == 1 and meta['n'] == 1)
+
+        # commits that don't touch the models leave the payload alone
+        Quote.query.first().text = 'changed'
+        db.session.commit()
+        worker_b.fetch('key', build, Node)
+        self.assertTrue(len(builds) == 1)
+
+        # worker_a sees its own commit straight away, worker_b after its interval
+        old = payload
+        Node.query.first().definition = 'changed'
+        db.session.commit()
+        meta, payload = worker_a.fetch('key', build, Node)
+        self.assertTrue(len(builds) == 2 and bytes(payload) == b'payload 2')
+        meta, payload = worker_b.fetch('key', build, Node)
+        self.assertTrue(len(builds) == 2 and meta['n'] == 2)
+        # a worker still sending the old payload keeps reading it unchanged
+        self.assertTrue(bytes(old) == b'payload 1')
+
+    def test_stale_while_building(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {}, b'payload %d' % len(builds)
+
+        store = shared_cache.store
+        store.fetch('key', build, Node)
+        Node.query.first().definition = 'changed'
+        db.session.commit()
+
+        # while another worker holds the lock file, the old payload is sent
+        other_worker = SharedStore(self.path)
+        with other_worker.flight.claim('key'):
+            meta, payload = store.fetch('key', build, Node)
+        self.assertTrue(bytes(payload) == b'payload 1' and store.stale == 1)
+        meta, payload = store.fetch('key', build, Node)
+        self.assertTrue(bytes(payload) == b'payload 2' and len(builds) == 2)
+
+    def test_model_caches_are_per_worker(self):
+        builds = {'a': 0, 'b': 0}
+
+        def cache(worker):
+            def build():
+                builds[worker] += 1
+                return builds[worker]
+            return ModelCache(build, 'model_cache_test', serve_stale=True)
+
+        # as two worker processes would, each with its own copy of the cache
+        worker_a, worker_b = cache('a'), cache('b')
+        worker_a.get()
+        worker_b.get()
+        worker_b.get()
+        self.assertTrue(builds == {'a': 1, 'b': 1})
+
+        # after an edit each builds its own value once, and never waits on
+        # (or is sent stale values because of) the other's build
+        bump('model_cache_test')
+        with worker_a._flight.claim('value'):
+            self.assertTrue(worker_b.get() == 2)
+        self.assertTrue(worker_a.get() == 2)
+        self.assertTrue(builds == {'a': 2, 'b': 2})
+
+    def test_prune_keeps_lock_files(self):
+        store = SharedStore(self.path, size=1)
+        for key in ('a', 'b'):
+            with store.flight.claim(key):
+                store.write(key, {}, key.encode())
+        self.assertTrue(len(store) == 1 and store.read('a') is None)
+        self.assertTrue(os.path.exists(store.flight.lock_file('a')))
+
+    def test_vt_data(self):
+        shared = self.client.get('/api/vt-data?format=binary')
+        self.assertTrue(len(shared_cache.store) == 1)
+        cached = self.client.get('/api/vt-data?format=binary')
+        self.assertTrue(shared_cache.store.hits == 1)
+        self.assertTrue(cached.data == shared.data)
+        self.assertTrue(cached.headers['ETag'] == shared.headers['ETag'])
+        self.assertTrue(self.client.get(
+            '/api/vt-data?format=binary',
+            headers={'If-None-Match': shared.headers['ETag']}
+        ).status_code == 304)
+
+        self.app.extensions['shared_cache'] = None
+        local = self.client.get('/api/vt-data?format=binary')
+        self.assertTrue(local.data == shared.data)
+        self.assertTrue(local.headers['ETag'] == shared.headers['ETag'])
+
+    def test_shared_pages(self):
+        self.app.config['PAGE_CACHE_TYPE'] = 'shared'
+        page_cache.init_app(self.app)
+        response = self.client.get('/api/qt-data')
+        self.assertTrue(response.headers['X-Cache'] == 'MISS')
+
+        cached = self.client.get('/api/qt-data')
+        self.assertTrue(cached.headers['X-Cache'] == 'HIT')
+        self.assertTrue(cached.get_json() == response.get_json())
+
+        Quote.query.first().text = 'changed'
+        db.session.commit()
+        response = self.client.get('/api/qt-data')
+        self.assertTrue(response.headers['X-Cache'] == 'MISS')
+        self.assertTrue(response.get_json()[0]['text'] == 'changed')
+
+    def test_shared_pages_need_a_path(self):
+        self.app.config['PAGE_CACHE_TYPE'] = 'shared'
+        self.app.config['SHARED_CACHE_PATH'] = None
+        with self.assertRaises(ValueError):
+            page_cache.init_app(self.app)
+
+    def test_builds_read_past_local_caches(self):
+        self.app.config['PAGE_CACHE_TYPE'] = 'shared'
+        page_cache.init_app(self.app)
+        shared_cache.store.interval = page_cache.store.interval = 0
+        self.client.get('/api/vt-data?format=columnar')
+        self.client.get('/alt-thesaurus-1')
+
+        # another worker's commit: the generations move, but this process's
+        # caches haven't noticed it yet and still hold the old thesaurus
+        db.session.add(Node(title='cheerful', published=True, order=1))
+        db.session.commit()
+        graph_index._key = version(*graph_index.models)
+        title_index._key = version(*title_index.models)
+
+        graph = self.client.get('/api/vt-data?format=columnar').get_data(as_text=True)
+        self.assertTrue(shared_cache.store.misses == 2 and '"cheerful"' in graph)
+        page = self.client.get('/alt-thesaurus-1').get_data(as_text=True)
+        self.assertTrue('href="/alt-thesaurus-2">cheerful' in page)
+        # and the caches here are current again
+        self.assertTrue(len(graph_index.get().nodes) == 2)
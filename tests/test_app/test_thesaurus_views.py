@@ -0,0 +1,203 @@
+import unittest
+from app import create_app, db, guard
+from app.cache import version
+from app.models import User, Node, NodeLink, graph_snapshots, word_list
+from app.utils.columnar import decode_binary
+from .helpers import QueryCountMixin
+
+
+class ThesaurusViewsTestCase(QueryCountMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        user = User(
+            email='myemail@gmail.edu',
+            username='username',
+            first_name='Hieronymus',
+            last_name='Kapsberger',
+            password='never guess this!',
+            roles='admin'
+        )
+        db.session.add(user)
+        nodes = [
+            Node(title='happy', definition='glad', published=True, order=1024,
+                synonyms=['glad', 'cheerful'], antonyms=['sad']),
+            Node(title='glad', published=True, order=2048, synonyms=['happy']),
+            Node(title='sad', published=True, order=3072, antonyms=['happy']),
+            Node(title='cheerful', published=False, order=4096),
+        ]
+        db.session.add_all(nodes)
+        db.session.commit()
+        self.headers = {'Authorization': f'Bearer {guard.encode_jwt_token(user)}'}
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_words(self):
+        response = self.client.get('/api/thesaurus/words', headers=self.headers)
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(response.get_json() == ['happy', 'glad', 'sad', 'cheerful'])
+        etag = response.headers['ETag']
+
+        response = self.client.get(
+            '/api/thesaurus/words',
+            headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertTrue(response.status_code == 304)
+
+        Node.new()
+        response = self.client.get(
+            '/api/thesaurus/words',
+            headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(response.headers['ETag'] != etag)
+        self.assertTrue(len(response.get_json()) == 5)
+
+    def test_words_after_another_workers_edit(self):
+        etag = self.client.get('/api/thesaurus/words', headers=self.headers).headers['ETag']
+        # committed by another worker: this process's versions don't move,
+        # but the generation of nodes does
+        db.session.add(Node(title='joyful', order=5000))
+        db.session.commit()
+        word_list._key = version(Node)
+        response = self.client.get(
+            '/api/thesaurus/words',
+            headers={**self.headers, 'If-None-Match': etag}
+        )
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue('joyful' in response.get_json())
+
+        etag = self.client.get('/api/vt-data').headers['ETag']
+        db.session.add(Node(title='glum', published=True, order=6000))
+        db.session.commit()
+        graph_snapshots['json']._key = version(Node, NodeLink)
+        response = self.client.get('/api/vt-data', headers={'If-None-Match': etag})
+        self.assertTrue(response.status_code == 200 and 'glum' in response.get_json())
+
+    def test_node_without_words(self):
+        response = self.client.get('/api/thesaurus-1', headers=self.headers)
+        self.assertTrue(len(response.get_json()['word_list']) == 4)
+        response = self.client.get('/api/thesaurus-1?words=0', headers=self.headers)
+        self.assertTrue('word_list' not in response.get_json())
+        self.assertTrue(response.get_json()['synonyms'] == ['glad', 'cheerful'])
+        # the links are loaded with the node, rather than in a query of their
+        # own, then its position is counted
+        with self.assertQueryCount(2):
+            Node.get_by_id(1, include_words=False)
+
+        data = dict(response.get_json(), text='pleased')
+        response = self.client.put('/api/thesaurus-1?words=0', json=data, headers=self.headers)
+        self.assertTrue(response.get_json()['text'] == 'pleased')
+        self.assertTrue('word_list' not in response.get_json())
+        response = self.client.put('/api/thesaurus-1', json=data, headers=self.headers)
+        self.assertTrue(len(response.get_json()['word_list']) == 4)
+
+    def test_vt_data_snapshot(self):
+        response = self.client.get('/api/vt-data')
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(response.get_json() == Node.to_dict())
+        self.assertTrue(list(response.get_json()) == ['glad', 'happy', 'sad'])
+        self.assertTrue(all('x' in n and 'y' in n for n in response.get_json()['happy']['nodes']))
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/vt-data', headers={'If-None-Match': etag})
+        self.assertTrue(response.status_code == 304)
+
+        # editing a link alone is enough to rebuild the snapshot
+        node = Node.query.filter_by(title='sad').first()
+        node.add_synonym('glum')
+        db.session.commit()
+        response = self.client.get('/api/vt-data', headers={'If-None-Match': etag})
+        self.assertTrue(response.status_code == 200)
+        self.assertTrue(response.headers['ETag'] != etag)
+        self.assertTrue('glum' in [n['label'] for n in response.get_json()['sad']['nodes']])
+
+    def test_vt_data_neighbourhood(self):
+        response = self.client.get('/api/vt-data/sad?depth=0')
+        self.assertTrue(list(response.get_json()) == ['sad'])
+        self.assertTrue(response.get_json()['sad'] == Node.to_dict()['sad'])
+
+        # cheerful is unpublished, so it stays a leaf of happy
+        response = self.client.get('/api/vt-data/sad')
+        self.assertTrue(sorted(response.get_json()) == ['happy', 'sad'])
+        response = self.client.get('/api/vt-data/sad?depth=2')
+        self.assertTrue(sorted(response.get_json()) == ['glad', 'happy', 'sad'])
+
+        self.assertTrue(self.client.get('/api/vt-data/cheerful').status_code == 404)
+        self.assertTrue(self.client.get('/api/vt-data/sad?depth=9').status_code == 400)
+
+    def test_vt_path(self):
+        response = self.client.get('/api/vt-path/sad/glad')
+        self.assertTrue(response.get_json() == [
+            {'title': 'sad', 'kind': None},
+            {'title': 'happy', 'kind': 'antonym'},
+            {'title': 'glad', 'kind': 'synonym'},
+        ])
+        self.assertTrue(self.client.get('/api/vt-path/sad/cheerful').status_code == 404)
+
+    def test_stats(self):
+        response = self.client.get('/api/thesaurus/stats', headers=self.headers)
+        stats = response.get_json()
+        self.assertTrue(stats['components'] == 1)
+        # cheerful is unpublished, so the public site can't follow that link
+        self.assertTrue(stats['unresolved'] == [['happy', 'synonym', 'cheerful']])
+        self.assertTrue(self.client.get('/api/thesaurus/stats').status_code == 401)
+
+    def test_search(self):
+        response = self.client.get('/api/thesaurus/search?q=CHEER')
+        self.assertTrue(response.get_json() == [])
+        response = self.client.get('/api/thesaurus/search?q=CHEER', headers=self.headers)
+        self.assertTrue(response.get_json() == [{'id': 4, 'title': 'cheerful'}])
+        response = self.client.get('/api/thesaurus/search?q=s&limit=1')
+        self.assertTrue(response.get_json() == [{'id': 3, 'title': 'sad'}])
+
+    def test_suggestions(self):
+        response = self.client.get('/api/thesaurus-3/suggestions', headers=self.headers)
+        # sad is the antonym of happy, so happy's synonyms are its antonyms
+        self.assertTrue(response.get_json() == {
+            'synonyms': [],
+            'antonyms': [{'title': 'glad', 'score': 1}, {'title': 'cheerful', 'score': 1}]
+        })
+        response = self.client.get('/api/thesaurus-99/suggestions', headers=self.headers)
+        self.assertTrue(response.status_code == 404)
+
+    def test_vt_data_formats(self):
+        graph = Node.to_dict()
+        columnar = self.client.get('/api/vt-data?format=columnar')
+        self.assertTrue(columnar.mimetype == 'application/vnd.thesaurus.columnar+json')
+        data = columnar.get_json(force=True)
+        strings = data['strings']
+        self.assertTrue([strings[t] for t in data['terms']['title']] == list(graph))
+        happy = data['terms']['title'].index(strings.index('happy'))
+        self.assertTrue([
+            (strings[t], k) for s, t, k in zip(
+                data['links']['source'], data['links']['target'], data['links']['kind']
+            ) if s == happy
+        ] == [('glad', 0), ('cheerful', 0), ('sad', 1)])
+        layout = data['layouts'][data['terms']['layout'][happy]]
+        self.assertTrue(layout[:2] == [graph['happy']['nodes'][0]['x'], graph['happy']['nodes'][0]['y']])
+
+        binary = self.client.get(
+            '/api/vt-data', headers={'Accept': 'application/vnd.thesaurus.columnar'}
+        )
+        self.assertTrue(binary.mimetype == 'application/vnd.thesaurus.columnar')
+        decoded = decode_binary(binary.data)
+        self.assertTrue(decoded['strings'] == strings)
+        self.assertTrue(decoded['terms'] == data['terms'])
+        self.assertTrue(decoded['links'] == data['links'])
+        self.assertTrue(len(binary.data) < len(columnar.data))
+
+        # browsers get the plain json, and each format has its own etag
+        plain = self.client.get('/api/vt-data', headers={'Accept': '*/*'})
+        self.assertTrue(plain.mimetype == 'application/json')
+        self.assertTrue('Accept' in plain.headers['Vary'])
+        self.assertTrue(len({plain.headers['ETag'], columnar.headers['ETag'], binary.headers['ETag']}) == 3)
+        self.assertTrue(self.client.get('/api/vt-data?format=xml').status_code == 400)
@@ -1,10 +1,20 @@
 import unittest
 import datetime
+import random
 from app.utils.blog_tuple import BlogResponse
 from app.utils.get_preview_text import get_preview_text
 from app.utils.link_check import link_check
 from app.utils.prettify_date import prettify_date
 from app.utils.to_json import node_to_json, init_Node_dict, add_node, add_link
+from app.utils.sort_keys import spread_keys, longest_increasing, assign_keys
+from app.utils.graph import ThesaurusGraph
+from app.utils.term_index import TermIndex, normalize, trigrams
+from app.utils.suggest import SuggestionIndex
+from app.utils.layout import RADIUS, force_layout, star_layouts, add_positions
+from app.utils.graph import GraphNode
+from app.utils.columnar import to_columnar, encode_binary, decode_binary
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.safe_attrs import safe_css, safe_uri
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -125,4 +135,229 @@ class UtilsTestCase(unittest.TestCase):
         with self.assertRaises(KeyError):
             node_dict['some attribute']
         self.assertTrue(len(node_dict['nodes']) == 3)
-        self.assertTrue(len(node_dict['links']) == 2)
\ No newline at end of file
+        self.assertTrue(len(node_dict['links']) == 2)
+
+    def test_sort_keys(self):
+        self.assertTrue(spread_keys(None, None, 2, 10) == [10, 20])
+        self.assertTrue(spread_keys(None, 100, 2, 10) == [80, 90])
+        self.assertTrue(spread_keys(100, None, 2, 10) == [110, 120])
+        self.assertTrue(spread_keys(0, 30, 2, 10) == [10, 20])
+        self.assertTrue(spread_keys(0, 2, 2, 10) is None)
+
+        self.assertTrue(longest_increasing([]) == set())
+        self.assertTrue(longest_increasing([1, 5, 2, 3, None, 4]) == {0, 2, 3, 5})
+
+        keys = {1: 10, 2: 20, 3: 30, 4: 40}
+        # moving one id only rewrites that id
+        self.assertTrue(assign_keys([1, 3, 2, 4], keys, 10) in ({2: 35}, {3: 15}))
+        self.assertTrue(assign_keys([1, 2, 3, 4], keys, 10) == {})
+        # no room left between neighbours respaces the whole list
+        packed = {1: 1, 2: 2, 3: 3}
+        self.assertTrue(assign_keys([1, 3, 2], packed, 10) == {1: 10, 2: 30, 3: 20})
+
+    def test_graph(self):
+        graph = ThesaurusGraph(
+            [(1, 'a', '', ''), (2, 'b', '', ''), (3, 'c', '', ''), (4, 'd', '', '')],
+            [(1, 'synonym', 'b'), (1, 'antonym', 'x'), (2, 'synonym', 'c'),
+             (2, 'antonym', 'a'), (3, 'synonym', 'c'), (9, 'synonym', 'a')]
+        )
+        self.assertTrue(len(graph) == 4)
+        self.assertTrue('x' not in graph)
+        # links to words without a node are kept for node_to_json
+        self.assertTrue(graph.nodes['a'].antonyms == ['x'])
+        self.assertTrue(graph.nodes['b'].order == 1)
+        self.assertTrue(graph.adjacency['a'] == ('b',))
+        self.assertTrue(graph.adjacency['d'] == ())
+        self.assertTrue([n.title for n in graph.neighbourhood('a', 0)] == ['a'])
+        self.assertTrue([n.title for n in graph.neighbourhood('a', 1)] == ['a', 'b'])
+        self.assertTrue([n.title for n in graph.neighbourhood('a', 5)] == ['a', 'b', 'c'])
+        self.assertTrue([n.title for n in graph.neighbourhood('c', 2)] == ['c'])
+
+    def test_graph_shortest_path(self):
+        graph = ThesaurusGraph(
+            [(1, 'a', '', ''), (2, 'b', '', ''), (3, 'c', '', ''), (4, 'd', '', '')],
+            [(1, 'synonym', 'b'), (2, 'antonym', 'c'), (3, 'synonym', 'a'), (4, 'synonym', 'x')]
+        )
+        self.assertTrue(graph.shortest_path('a', 'c') == ['a', 'b', 'c'])
+        # links only go one way
+        self.assertTrue(graph.shortest_path('c', 'b') == ['c', 'a', 'b'])
+        self.assertTrue(graph.shortest_path('a', 'a') == ['a'])
+        self.assertTrue(graph.shortest_path('a', 'd') is None)
+        self.assertTrue(graph.shortest_path('a', 'x') is None)
+        self.assertTrue(graph.link_kind('b', 'c') == 'antonym')
+
+        # compare against a plain breadth first search on a random graph
+        rng = random.Random(0)
+        n = 200
+        graph = ThesaurusGraph(
+            [(i, str(i), '', '') for i in range(n)],
+            [(i, 'synonym', str(rng.randrange(n))) for i in range(n) for _ in range(2)]
+        )
+        for _ in range(50):
+            start, end = str(rng.randrange(n)), str(rng.randrange(n))
+            depth = {start: 0}
+            queue = [start]
+            for current in queue:
+                for t in graph.adjacency[current]:
+                    if t not in depth:
+                        depth[t] = depth[current] + 1
+                        queue.append(t)
+            path = graph.shortest_path(start, end)
+            if end not in depth:
+                self.assertTrue(path is None)
+                continue
+            self.assertTrue(len(path) == depth[end] + 1)
+            self.assertTrue(path[0] == start and path[-1] == end)
+            self.assertTrue(all(b in graph.adjacency[a] for a, b in zip(path, path[1:])))
+
+    def test_graph_stats(self):
+        graph = ThesaurusGraph(
+            [(1, 'a', '', ''), (2, 'b', '', ''), (3, 'c', '', ''), (4, 'd', '', '')],
+            [(1, 'synonym', 'b'), (1, 'antonym', 'x'), (2, 'synonym', 'a'), (3, 'antonym', 'y')]
+        )
+        self.assertTrue(graph.stats == {
+            'nodes': 4,
+            'links': 2,
+            'components': 3,
+            'largest_component': 2,
+            'isolated': ['c', 'd'],
+            'unresolved': [('a', 'antonym', 'x'), ('c', 'antonym', 'y')],
+        })
+
+    def test_term_index(self):
+        self.assertTrue(normalize('  Ice\tCream ') == 'ice cream')
+        self.assertTrue(normalize(None) == '')
+        self.assertTrue(trigrams('ab') == {' ab', 'ab '})
+        self.assertTrue(trigrams('a') == {' a '})
+
+        index = TermIndex([
+            (1, 'Happy', True), (2, 'happen', True), (3, 'hat', False),
+            (4, 'HAPPY ', True), (5, '', True),
+        ])
+        self.assertTrue(len(index) == 4)
+        self.assertTrue(index.prefix('hap') == [(2, 'happen'), (1, 'Happy'), (4, 'HAPPY ')])
+        self.assertTrue(index.prefix('hap', limit=2) == [(2, 'happen'), (1, 'Happy')])
+        self.assertTrue(index.prefix('ha') == [(2, 'happen'), (1, 'Happy'), (4, 'HAPPY ')])
+        self.assertTrue(index.prefix('ha', published_only=False)[-1] == (3, 'hat'))
+        self.assertTrue(index.fuzzy('hapyp')[:2] == [(1, 'Happy'), (4, 'HAPPY ')])
+        self.assertTrue(index.fuzzy('zzz') == [])
+        self.assertTrue(index.search('hapy') == [(1, 'Happy'), (4, 'HAPPY '), (2, 'happen')])
+
+        index.remove(1)
+        index.remove(4)
+        index.remove(99)
+        self.assertTrue(index.prefix('happy') == [])
+        self.assertTrue('happy' not in index._keys)
+        index.add(2, 'Joy', True)
+        index.add(3, 'hat', True)
+        self.assertTrue(index.prefix('h') == [(3, 'hat')])
+        self.assertTrue(index.search('joy') == [(2, 'Joy')])
+
+    def test_suggestions(self):
+        index = SuggestionIndex(
+            [(1, 'happy'), (2, 'glad'), (3, 'sad'), (4, 'Joyful'), (5, '')],
+            [(1, 'synonym', 'glad'), (2, 'synonym', 'joyful'), (2, 'synonym', 'Merry'),
+             (3, 'antonym', 'happy'), (3, 'antonym', 'joyful'), (4, 'synonym', 'Happy '),
+             (5, 'synonym', 'happy')]
+        )
+        self.assertTrue(5 not in index)
+        # joyful is already linked to happy, through its own link
+        self.assertTrue(index.suggest(1) == {'synonyms': [('Merry', 1)], 'antonyms': []})
+        # sad is an antonym of two of glad's synonyms
+        self.assertTrue(index.suggest(2) == {'synonyms': [], 'antonyms': [('sad', 2)]})
+        # antonym of an antonym counts as a synonym
+        self.assertTrue(index.suggest(3)['synonyms'] == [])
+        self.assertTrue(index.suggest(4)['synonyms'] == [('Merry', 1)])
+        self.assertTrue(index.suggest(4, limit=0) == {'synonyms': [], 'antonyms': []})
+        self.assertTrue(index.suggest(99) == {'synonyms': [], 'antonyms': []})
+
+        index = SuggestionIndex(
+            [(1, 'up'), (2, 'down'), (3, 'rise')],
+            [(1, 'antonym', 'down'), (3, 'antonym', 'down')]
+        )
+        self.assertTrue(index.suggest(1)['synonyms'] == [('rise', 1)])
+
+    def test_layout(self):
+        shape = (3, 2, 0.7, 0.1)
+        positions = star_layouts([shape])[shape]
+        self.assertTrue(len(positions) == 8)
+        # centred, and no two circles overlapping
+        self.assertTrue(abs(sum(x for x, _ in positions)) < 1)
+        self.assertTrue(all(
+            (x1 - x2) ** 2 + (y1 - y2) ** 2 > (2 * RADIUS - 1) ** 2
+            for i, (x1, y1) in enumerate(positions)
+            for x2, y2 in positions[i + 1:]
+        ))
+        # laid out alone or in a batch, a shape comes out the same
+        batch = force_layout(8, [[1, 2, 3, 4, 5, 6, 7]] * 3, [
+            [0, 0, 1, 1, 1, 1, 2], [0, 0, 1, 1, 1, 2, 2], [0, 0, 1, 2, 2, 2, 2]
+        ], [[0.7, 0.7] + [0.1] * 5] * 3)
+        self.assertTrue(tuple((round(x, 1), round(y, 1)) for x, y in batch[1].tolist()) == positions)
+
+        node = GraphNode(1, 'happy', '', '', 0, ['glad', 'merry'], ['sad'])
+        graph = add_positions({'happy': node_to_json(node)})
+        self.assertTrue(
+            [(n['x'], n['y']) for n in graph['happy']['nodes']]
+            == list(star_layouts([(2, 1, 0.7, 0.1)])[(2, 1, 0.7, 0.1)])
+        )
+
+    def test_columnar(self):
+        nodes = [
+            GraphNode(1, 'happy', 'glad', None, 0, ['glad', 'merry'], ['sad']),
+            GraphNode(2, 'glad', '', '', 1, ['happy'], []),
+            GraphNode(3, 'ünïcode', None, None, 2, [], []),
+        ]
+        data = to_columnar(nodes)
+        self.assertTrue(data['strings'] == ['happy', 'glad', '', 'merry', 'sad', 'ünïcode'])
+        self.assertTrue(data['terms']['title'] == [0, 1, 5])
+        self.assertTrue(data['terms']['definition'] == [1, 2, 2])
+        self.assertTrue(data['links'] == {
+            'source': [0, 0, 0, 1], 'target': [1, 3, 4, 0], 'kind': [0, 0, 1, 0]
+        })
+        self.assertTrue(len(data['layouts']) == 3)
+        self.assertTrue(len(data['layouts'][data['terms']['layout'][0]]) == 12)
+
+        decoded = decode_binary(encode_binary(data))
+        self.assertTrue(decoded['strings'] == data['strings'])
+        self.assertTrue(decoded['terms'] == data['terms'])
+        self.assertTrue(decoded['links'] == data['links'])
+        self.assertTrue(all(
+            abs(a - b) < 0.01
+            for x, y in zip(decoded['layouts'], data['layouts']) for a, b in zip(x, y)
+        ))
+
+        empty = decode_binary(encode_binary(to_columnar([])))
+        self.assertTrue(empty['strings'] == [] and empty['links']['source'] == [])
+        with self.assertRaises(ValueError):
+            decode_binary(b'nope')
+
+    def test_cursor(self):
+        cursor = encode_cursor(2048, 7, 30)
+        self.assertTrue('=' not in cursor)
+        self.assertTrue(decode_cursor(cursor) == (2048, 7, 30))
+        when = datetime.datetime(2021, 3, 4, 5, 6, 7, 890)
+        cursor = encode_cursor(when, 3, 10)
+        self.assertTrue(decode_cursor(cursor, datetime.datetime.fromisoformat) == (when, 3, 10))
+        for bad in ('', 'nonsense', encode_cursor(1, 'x', 2), encode_cursor('now', 1, 2)):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad, datetime.datetime.fromisoformat)
+        # values of the wrong type for the column
+        for bad in (encode_cursor([1], 1, 2), encode_cursor(1, 1, 2), encode_cursor(True, 1, 2)):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad, datetime.datetime.fromisoformat)
+        for bad in (encode_cursor('1', 1, 2), encode_cursor({}, 1, 2), encode_cursor(True, 1, 2),
+                encode_cursor(1.5, 1, 2), encode_cursor(1, True, 2)):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad)
+
+    def test_safe_attrs(self):
+        for uri in ('https://www.youtube.com/embed/x', 'http://a.b/c.png', '/static/a.png',
+                'a.png', '//cdn.example.com/a.png'):
+            self.assertTrue(safe_uri(uri) == uri)
+        for uri in ('javascript:alert(1)', ' JavaScript:alert(1)', 'java\tscript:alert(1)',
+                'data:text/html,<script>', 'vbscript:x', None, ''):
+            self.assertTrue(safe_uri(uri) == '')
+        self.assertTrue(safe_css('color: red; margin: 0') == 'color: red; margin: 0')
+        self.assertTrue(safe_css('color: red;background: url(javascript:x)') == 'color: red')
+        self.assertTrue(safe_css('width: expression(alert(1))') == '')
+        self.assertTrue(safe_css(None) == '')